@@ -28,10 +28,19 @@ from typing import Dict, List, Optional, Tuple
 
 from groq import Groq
 from .models import ExtractedIntelligence
-from .risk_engine import risk_engine, ScamStage, AgentMemory
+from .risk_engine import risk_engine, ScamStage, AgentMemory, DEVANAGARI_PATTERN
+from .keyword_matcher import KeywordMatcher
 
 logger = logging.getLogger(__name__)
 
+# Stage groups (built once, not per call)
+EARLY_STAGES = frozenset({ScamStage.NORMAL, ScamStage.HOOK})
+ENGAGED_STAGES = frozenset({ScamStage.TRUST, ScamStage.THREAT})
+POST_DETECTION_STAGES = frozenset({ScamStage.THREAT, ScamStage.ACTION, ScamStage.CONFIRMED})
+
+# Sentence boundary used to keep LLM replies to one sentence
+SENTENCE_SPLIT_PATTERN = re.compile(r'(?<=[.!?।])\s+')
+
 
 # ==============================================================================
 # SAFETY VALIDATOR
@@ -167,6 +176,17 @@ class AgentController:
             "account_details": ["account", "bank", "ifsc", "branch"],
             "app_or_link": ["app", "link", "download", "install", "qr"],
         }
+        # One automaton over every intent keyword; each keyword id maps to
+        # the first intent (in map order) that lists it
+        self._intent_names = tuple(self.SEMANTIC_INTENT_MAP)
+        self._intent_matcher = KeywordMatcher(
+            kw for keywords in self.SEMANTIC_INTENT_MAP.values() for kw in keywords
+        )
+        first_intent = {}
+        for intent_idx, keywords in enumerate(self.SEMANTIC_INTENT_MAP.values()):
+            for kw in keywords:
+                first_intent.setdefault(kw, intent_idx)
+        self._intent_keyword_rank = tuple(first_intent[kw] for kw in self._intent_matcher.keywords)
     
     def _detect_language(self, text: str) -> str:
         """Detect Hindi vs English from text."""
@@ -175,7 +195,7 @@ class AgentController:
             'kya', 'hai', 'hain', 'mujhe', 'aap', 'hoon', 'nahi', 'bhai', 
             'beta', 'ji', 'accha', 'theek', 'batao', 'bhejo', 'abhi'
         ]
-        if re.search(r'[\u0900-\u097F]', text):
+        if DEVANAGARI_PATTERN.search(text):
             return "hindi"
         if sum(1 for w in hindi_words if w in text_lower) >= 2:
             return "hindi"
@@ -183,11 +203,13 @@ class AgentController:
     
     def _extract_intent(self, response: str) -> str:
         """Map response to semantic intent for anti-loop."""
-        response_lower = response.lower()
-        for intent, keywords in self.SEMANTIC_INTENT_MAP.items():
-            if any(kw in response_lower for kw in keywords):
-                return intent
-        return "generic"
+        # Same result as checking each intent's keywords in map order:
+        # the earliest intent with any keyword in the response wins
+        hit_ids = self._intent_matcher.find_ids(response.lower())
+        if not hit_ids:
+            return "generic"
+        rank = self._intent_keyword_rank
+        return self._intent_names[min(rank[kw_id] for kw_id in hit_ids)]
     
     def _get_natural_question(self, session, language: str) -> Tuple[str, str]:
         """Get a natural follow-up question that hasn't been asked."""
@@ -201,8 +223,9 @@ class AgentController:
         
         # All exhausted - use simple acknowledgment
         stalling = templates["stalling"]
+        recent = {sq.lower() for sq in session.recent_questions}
         for s in stalling:
-            if s.lower() not in [sq.lower() for sq in session.recent_questions]:
+            if s.lower() not in recent:
                 return s, "acknowledgment"
         
         return "Phir?" if language == "hindi" else "Then?", "acknowledgment"
@@ -210,9 +233,9 @@ class AgentController:
     def _get_fallback(self, stage: ScamStage, language: str) -> str:
         """Get fallback response."""
         templates = self.templates.get(language, self.templates["hindi"])
-        if stage in [ScamStage.NORMAL, ScamStage.HOOK]:
+        if stage in EARLY_STAGES:
             return random.choice(templates["confusion"])
-        elif stage in [ScamStage.TRUST, ScamStage.THREAT]:
+        elif stage in ENGAGED_STAGES:
             return random.choice(templates["confusion"] + templates["followup"])
         else:
             return random.choice(templates["followup"] + templates["stalling"])
@@ -264,7 +287,7 @@ class AgentController:
         # ==================================================================
         # POST-DETECTION: Use natural questions (not interrogation)
         # ==================================================================
-        if scam_detected or current_stage in [ScamStage.THREAT, ScamStage.ACTION, ScamStage.CONFIRMED]:
+        if scam_detected or current_stage in POST_DETECTION_STAGES:
             question, intent = self._get_natural_question(session, language)
             session.add_question(question, intent)
             session.check_stall()
@@ -315,7 +338,7 @@ Reply with 1 very short confused response:"""
                 reply = reply[3:].strip()
             
             # Truncate to 1 sentence
-            sentences = re.split(r'(?<=[.!?।])\s+', reply)
+            sentences = SENTENCE_SPLIT_PATTERN.split(reply)
             reply = sentences[0] if sentences else reply
             
             # Safety check
@@ -1,5 +1,6 @@
 import asyncio
 import logging
+from typing import Optional
 import httpx
 from .models import FinalResultPayload
 
@@ -21,31 +22,57 @@ CALLBACK_URL = "https://hackathon.guvi.in/api/updateHoneyPotFinalResult"
 # 3. On final failure, session.callback_sent is reset so a future turn
 #    can re-trigger the callback attempt.
 # 4. The original send_final_result() is preserved for direct use.
+# 5. One pooled AsyncClient is shared by every callback, so bursts of
+#    completed sessions reuse keep-alive connections instead of paying
+#    DNS + TCP + TLS setup per call.  Closed on app shutdown.
 # ======================================================================
 
+_client: Optional[httpx.AsyncClient] = None
+
+
+def _get_client() -> httpx.AsyncClient:
+    """Return the shared callback client, creating it on first use."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            timeout=10.0,
+            limits=httpx.Limits(max_keepalive_connections=32)
+        )
+    return _client
+
+
+async def close_client():
+    """Close the shared callback client (called on app shutdown)."""
+    global _client
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+    _client = None
+
 
 async def send_final_result(payload: FinalResultPayload) -> bool:
     """
     Single-shot callback to GUVI evaluation endpoint.
     Returns True on success (HTTP 200), False otherwise.
     """
-    async with httpx.AsyncClient() as client:
-        try:
-            data = payload.model_dump() if hasattr(payload, 'model_dump') else payload.dict()
-            
-            response = await client.post(
-                CALLBACK_URL,
-                json=data,
-                headers={"Content-Type": "application/json"},
-                timeout=10.0
-            )
-            
-            logger.info(f"Callback response: status={response.status_code}")
-            return response.status_code == 200
-            
-        except Exception as e:
-            logger.error(f"Callback failed: {e}")
-            return False
+    client = _get_client()
+    try:
+        # Serialize in pydantic-core rather than dumping to a dict and
+        # letting httpx re-encode it with the stdlib json module.
+        body = payload.model_dump_json() if hasattr(payload, 'model_dump_json') else payload.json()
+        
+        response = await client.post(
+            CALLBACK_URL,
+            content=body,
+            headers={"Content-Type": "application/json"},
+            timeout=10.0
+        )
+        
+        logger.info(f"Callback response: status={response.status_code}")
+        return response.status_code == 200
+        
+    except Exception as e:
+        logger.error(f"Callback failed: {e}")
+        return False
 
 
 async def send_final_result_with_retry(
@@ -18,18 +18,40 @@ KEY CHANGES:
 
 import re
 import logging
-from typing import Dict, List, Optional, Tuple
+from typing import DefaultDict, Dict, List, Optional, Tuple
+from collections import OrderedDict, defaultdict
 from dataclasses import dataclass, field
 from datetime import datetime
 from .models import ExtractedIntelligence
-from .risk_engine import ScamStage
+from .risk_engine import ScamStage, MAX_SESSIONS, DATACLASS_SLOTS
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Module logger; handlers/levels are configured by the app (main.py)
 logger = logging.getLogger(__name__)
 
+# UPI search window around each '@': the local part is at most 256 chars
+# (pattern bound) and the handle is shorter than 32
+UPI_LOCAL_MAX_LEN = 256
+UPI_HANDLE_WINDOW = 32
+# Messages up to this length use a plain findall (at most ~1.5 ms)
+UPI_FINDALL_MAX_LEN = 512
+# UPI local-part charset, for walking back from an '@' to its run start.
+# Includes the non-ASCII chars that [a-zA-Z] also matches under IGNORECASE
+# (dotted/dotless i, long s, Kelvin sign).
+UPI_LOCAL_CHARS = frozenset(
+    "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789._-"
+    "\u0130\u0131\u017f\u212a"
+)
 
-@dataclass
+# Separators stripped from phone matches before normalization
+PHONE_SEPARATOR_PATTERN = re.compile(r'[\s.-]')
+
+# Stages at which HEAVY extraction (UPI, bank, phone, URL) runs
+HEAVY_EXTRACTION_STAGES = frozenset({
+    ScamStage.TRUST, ScamStage.THREAT, ScamStage.ACTION, ScamStage.CONFIRMED
+})
+
+
+@dataclass(**DATACLASS_SLOTS)
 class AttributedExtraction:
     """
     Intelligence extraction with MANDATORY source attribution.
@@ -74,8 +96,24 @@ class IntelligenceExtractor:
         self._init_patterns()
         self._init_keyword_patterns()
         # Attributed extractions with source tracking
-        self.attributed_extractions: Dict[str, List[AttributedExtraction]] = {}
-        self.turn_counter: Dict[str, int] = {}
+        # (defaultdicts: a missing session starts empty / at turn 0)
+        self.attributed_extractions: DefaultDict[str, List[AttributedExtraction]] = defaultdict(list)
+        self.turn_counter: DefaultDict[str, int] = defaultdict(int)
+        # Same LRU bound as the risk engine's session map: the oldest
+        # session's extraction state is dropped past MAX_SESSIONS
+        self._session_order: "OrderedDict[str, None]" = OrderedDict()
+    
+    def _touch_session(self, session_id: str):
+        """Mark session as most recently used; evict the oldest past MAX_SESSIONS."""
+        order = self._session_order
+        if session_id in order:
+            order.move_to_end(session_id)
+            return
+        order[session_id] = None
+        if len(order) > MAX_SESSIONS:
+            evicted_id, _ = order.popitem(last=False)
+            self.attributed_extractions.pop(evicted_id, None)
+            self.turn_counter.pop(evicted_id, None)
     
     def _init_patterns(self):
         """Initialize regex patterns for HEAVY extraction"""
@@ -281,10 +319,6 @@ class IntelligenceExtractor:
                           f"Only scammer messages may be processed for intelligence.")
             return current_intelligence
         
-        # Initialize extraction history
-        if session_id not in self.attributed_extractions:
-            self.attributed_extractions[session_id] = []
-        
         # Extract UPI IDs
         self._extract_upi_ids(text, current_intelligence, turn_number, session_id)
         
@@ -329,8 +363,7 @@ class IntelligenceExtractor:
             return current_intelligence
         
         # Track turn
-        if session_id not in self.turn_counter:
-            self.turn_counter[session_id] = 0
+        self._touch_session(session_id)
         self.turn_counter[session_id] += 1
         turn = self.turn_counter[session_id]
         
@@ -342,11 +375,11 @@ class IntelligenceExtractor:
             if kw not in current_intelligence.suspiciousKeywords:
                 current_intelligence.suspiciousKeywords.append(kw)
         
-        # HEAVY extraction - only at THREAT+ stages
+        # HEAVY extraction - only at TRUST+ stages
         # This ensures extraction happens AFTER we have enough context
         # ISSUE 5: message_source is forwarded so extract_heavy() can
         # independently verify the source (defense-in-depth).
-        if scam_stage in [ScamStage.TRUST, ScamStage.THREAT, ScamStage.ACTION, ScamStage.CONFIRMED]:
+        if scam_stage in HEAVY_EXTRACTION_STAGES:
             current_intelligence = self.extract_heavy(
                 text, current_intelligence, session_id, turn,
                 message_source=message_source
@@ -362,13 +395,53 @@ class IntelligenceExtractor:
         session_id: str
     ):
         """Extract UPI IDs with validation"""
-        matches = self.patterns["upi"].findall(text)
+        matches = self._find_upi_matches(text)
         for upi in matches:
             upi = upi.strip().lower()
             if upi and upi not in intel.upiIds and '@' in upi and len(upi) >= 5:
                 intel.upiIds.append(upi)
                 self._record_extraction(session_id, upi, "upi", 0.9, turn, text[:50])
     
+    def _find_upi_matches(self, text: str) -> List[str]:
+        """
+        Same result as patterns["upi"].findall(text), in linear time.
+        
+        The pattern opens with a 2-256 char run, so a plain findall tries
+        up to 256 characters from every position (tens of ms on a long
+        adversarial message such as ("a"*254 + " @")*20). Every match
+        contains exactly one '@', and its local part is the run of
+        local-part chars ending at that '@', so each '@' walks back to the
+        start of that run and needs one anchored match from there. Walks
+        never cross the previous '@' or match, so each char is visited
+        once. Typical short messages still take the plain findall.
+        """
+        pattern = self.patterns["upi"]
+        if '@' not in text:
+            return []
+        if len(text) <= UPI_FINDALL_MAX_LEN:
+            return pattern.findall(text)
+        matches = []
+        pos = 0
+        prev_at = -1
+        at = text.find('@')
+        while at != -1:
+            start = max(pos, prev_at + 1, at - UPI_LOCAL_MAX_LEN)
+            match = None
+            if at - start >= 2:
+                run_start = at
+                while run_start > start and text[run_start - 1] in UPI_LOCAL_CHARS:
+                    run_start -= 1
+                if at - run_start >= 2:
+                    match = pattern.match(text, run_start, at + 1 + UPI_HANDLE_WINDOW)
+            if match:
+                matches.append(match.group())
+                pos = match.end()
+                at = text.find('@', pos)
+            else:
+                prev_at = at
+                at = text.find('@', at + 1)
+        return matches
+    
     def _extract_bank_accounts(
         self, 
         text: str, 
@@ -412,7 +485,7 @@ class IntelligenceExtractor:
         """Extract phone numbers (Indian format)"""
         matches = self.patterns["phone_indian"].findall(text)
         for phone in matches:
-            phone = re.sub(r'[\s.-]', '', phone)
+            phone = PHONE_SEPARATOR_PATTERN.sub('', phone)
             # Normalize to 10 digits
             if phone.startswith('+91'):
                 phone = phone[3:]
@@ -506,9 +579,6 @@ class IntelligenceExtractor:
         SAFETY: Source is ALWAYS "scammer" because we only call
         this method for scammer messages (filtered in extract()).
         """
-        if session_id not in self.attributed_extractions:
-            self.attributed_extractions[session_id] = []
-        
         item = AttributedExtraction(
             value=value,
             item_type=item_type,
@@ -517,6 +587,9 @@ class IntelligenceExtractor:
             turn_number=turn,
             context=context[:100]  # Limit context length
         )
+        # Every write registers recency, so sessions reached only through
+        # extract_heavy() are LRU-bounded too
+        self._touch_session(session_id)
         self.attributed_extractions[session_id].append(item)
         
         # Log extraction with attribution
@@ -536,10 +609,8 @@ class IntelligenceExtractor:
         """
         history = self.attributed_extractions.get(session_id, [])
         
-        by_type = {}
+        by_type = defaultdict(list)
         for item in history:
-            if item.item_type not in by_type:
-                by_type[item.item_type] = []
             by_type[item.item_type].append({
                 "value": item.value,
                 "source": item.source,
@@ -550,7 +621,7 @@ class IntelligenceExtractor:
         return {
             "total_items": len(history),
             "all_from_scammer": True,  # By design, we only extract from scammer
-            "by_type": by_type,
+            "by_type": dict(by_type),
             "high_value_count": sum(1 for item in history 
                                    if item.item_type in ["upi", "bank_account", "phone"]),
             "attributions": [item.to_dict() for item in history]
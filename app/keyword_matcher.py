@@ -0,0 +1,54 @@
+"""
+KEYWORD MATCHER - Single-pass multi-keyword substring scanning
+
+Detectors test dozens of keyword/ngram literals against the same
+lowercased message with `kw in text`, one full scan per keyword.
+KeywordMatcher builds ONE Aho-Corasick automaton over all keywords so
+the text is scanned ONCE and every contained keyword is reported.
+
+SEMANTICS (identical to `[kw for kw in keywords if kw in text]`):
+- Plain substring matching (no word boundaries)
+- Each keyword reported at most once, in insertion order
+- Keywords must already be lowercased; callers pass lowercased text
+
+Uses pyahocorasick when installed, otherwise falls back to the plain
+substring loop with the same results.
+"""
+
+from typing import Iterable, List
+
+try:
+    import ahocorasick
+except ImportError:  # Optional accelerator
+    ahocorasick = None
+
+
+class KeywordMatcher:
+    """Find which of a fixed set of keywords occur in a text."""
+
+    def __init__(self, keywords: Iterable[str]):
+        # Deduplicate while preserving insertion order
+        self.keywords = tuple(dict.fromkeys(keywords))
+        self._automaton = None
+
+        if ahocorasick is not None and self.keywords:
+            automaton = ahocorasick.Automaton()
+            for idx, kw in enumerate(self.keywords):
+                automaton.add_word(kw, idx)
+            automaton.make_automaton()
+            self._automaton = automaton
+
+    def find_ids(self, text: str) -> List[int]:
+        """
+        Return indices (into self.keywords) of the keywords contained in
+        text, ascending. Lets callers keep per-keyword data in tuples
+        aligned with self.keywords instead of dicts keyed by string.
+        """
+        if self._automaton is None:
+            return [idx for idx, kw in enumerate(self.keywords) if kw in text]
+        return sorted({idx for _, idx in self._automaton.iter(text)})
+
+    def find(self, text: str) -> List[str]:
+        """Return the keywords contained in text (each once, insertion order)."""
+        keywords = self.keywords
+        return [keywords[idx] for idx in self.find_ids(text)]
@@ -10,20 +10,29 @@ Agent Controller → Heavy Intelligence Extraction → Mission Completion Check
 API REQUEST/RESPONSE FORMAT IS UNCHANGED
 """
 
-import re
 import asyncio
+import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from typing import Dict
-from .models import IncomingRequest, AgentResponse, ExtractedIntelligence, FinalResultPayload
+from .models import IncomingRequest, AgentResponse, FinalResultPayload
 from .auth import get_api_key
 from .scam_detector import ScamDetector
 from .agent_controller import AgentController
 from .intelligence_extractor import intelligence_extractor
-from .callback_client import send_final_result_with_retry
-from .risk_engine import risk_engine, ScamStage
+from .callback_client import send_final_result_with_retry, close_client
+from .risk_engine import risk_engine
 
-app = FastAPI(title="Scam Honeypot API", version="2.0.0")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """App lifecycle: release the pooled callback HTTP client on shutdown."""
+    yield
+    await close_client()
+
+
+app = FastAPI(title="Scam Honeypot API", version="2.0.0", lifespan=lifespan)
 
 # Add CORS middleware
 app.add_middleware(
@@ -34,11 +43,28 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Logging is configured once here, by the app, not on library import
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
 # Initialize components
 scam_detector = ScamDetector()
 agent_controller = AgentController()
 
 
+def _error_response() -> AgentResponse:
+    """
+    Graceful degradation reply for a failed LLM/pipeline call.
+    
+    Returned from inside the route (not from an app-level exception
+    handler) so it still passes through CORSMiddleware.
+    """
+    return AgentResponse(
+        status="error",
+        reply="I'm having trouble understanding. Could you repeat that?"
+    )
+
+
 @app.post("/", response_model=AgentResponse)
 async def root_handler(request: IncomingRequest, api_key: str = Depends(get_api_key)):
     """Root endpoint that forwards to chat handler for tester compatibility"""
@@ -60,114 +86,78 @@ async def chat_handler(request: IncomingRequest, api_key: str = Depends(get_api_
     7. Heavy Intelligence Extraction (at THREAT+ stages)
     8. Mission Completion Check
     """
+    session_id = request.sessionId
+    
+    # Validate required fields
+    if not request.message or not request.message.text:
+        raise HTTPException(
+            status_code=400, 
+            detail="Invalid request: 'message' field with 'text' is required"
+        )
+    
+    if not session_id:
+        raise HTTPException(
+            status_code=400,
+            detail="Invalid request: 'sessionId' field is required"
+        )
+    
+    # Get or create session state.
+    # LANGUAGE LOCK: a new session is locked to the language of the
+    # scammer's first message (Hindi or English) at creation time, so
+    # subsequent turns skip detection entirely.
+    session = risk_engine.get_or_create_session(
+        session_id, first_message=request.message.text
+    )
+    
+    # ==================================================================
+    # ISSUE 1 FIX: SINGLE SOURCE OF TRUTH FOR CONVERSATION HISTORY
+    # ------------------------------------------------------------------
+    # The API accepts conversationHistory in every request, AND the
+    # SessionState tracks conversation_turns internally.  Using both
+    # causes double-counting, inflated turn counts, and bad summaries.
+    #
+    # RULE: Use incoming conversationHistory ONLY on the FIRST turn
+    # of a session (turn_count == 0).  For all subsequent turns, the
+    # session's internal conversation_turns is the sole authority.
+    # ==================================================================
+    if session.turn_count == 0:
+        # First turn: seed session with any provided history
+        effective_history = request.conversationHistory
+    else:
+        # Subsequent turns: IGNORE incoming history to prevent duplication
+        effective_history = []
+    
+    # =====================================================================
+    # STEP 1-5: Detection Pipeline (runs on every turn)
+    # Handles: Light extraction, Risk scoring, Stage update, LLM judge
+    # =====================================================================
     try:
-        session_id = request.sessionId
-        
-        # Validate required fields
-        if not request.message or not request.message.text:
-            raise HTTPException(
-                status_code=400, 
-                detail="Invalid request: 'message' field with 'text' is required"
-            )
-        
-        if not session_id:
-            raise HTTPException(
-                status_code=400,
-                detail="Invalid request: 'sessionId' field is required"
-            )
-        
-        # Get or create session state
-        session = risk_engine.get_or_create_session(session_id)
-        
-        # ==================================================================
-        # LANGUAGE LOCK: Match scammer's language
-        # ------------------------------------------------------------------
-        # If scammer speaks Hindi → reply in Hindi
-        # If scammer speaks English → reply in English
-        #
-        # Detection is based on FIRST MESSAGE from scammer.
-        # Auto-detect is PRIMARY, metadata is fallback only.
-        # Once locked, language never changes for the session.
-        # ==================================================================
-        if session.locked_language is None:
-            text_lower = request.message.text.lower()
-            
-            # Hindi indicators (Devanagari script OR romanized Hindi words)
-            hindi_words = [
-                'kya', 'hai', 'hain', 'mujhe', 'aap', 'aapka', 'hoon',
-                'nahi', 'bhai', 'beta', 'ji', 'accha', 'theek', 'batao',
-                'bhejo', 'abhi', 'madad', 'mera', 'naam', 'aapke', 'karo',
-                'karna', 'hoga', 'padega', 'dijiye', 'kijiye', 'bolo',
-                'suno', 'dekho', 'jaldi', 'turant', 'paise', 'rupay',
-            ]
-            hindi_count = sum(1 for w in hindi_words if w in text_lower)
-            
-            # Detect language from scammer's first message
-            if re.search(r'[\u0900-\u097F]', text_lower):
-                # Devanagari script detected → definitely Hindi
-                detected_lang = "hindi"
-            elif hindi_count >= 2:
-                # Multiple romanized Hindi words → Hindi
-                detected_lang = "hindi"
-            else:
-                # Default to English if no Hindi detected
-                detected_lang = "english"
-            
-            session.lock_language(detected_lang)
-            print(f"🌐 [{session_id}] Language locked to: {detected_lang} (from scammer's first message)")
-        
-        # ==================================================================
-        # ISSUE 1 FIX: SINGLE SOURCE OF TRUTH FOR CONVERSATION HISTORY
-        # ------------------------------------------------------------------
-        # The API accepts conversationHistory in every request, AND the
-        # SessionState tracks conversation_turns internally.  Using both
-        # causes double-counting, inflated turn counts, and bad summaries.
-        #
-        # RULE: Use incoming conversationHistory ONLY on the FIRST turn
-        # of a session (turn_count == 0).  For all subsequent turns, the
-        # session's internal conversation_turns is the sole authority.
-        # ==================================================================
-        if session.turn_count == 0:
-            # First turn: seed session with any provided history
-            effective_history = request.conversationHistory
-        else:
-            # Subsequent turns: IGNORE incoming history to prevent duplication
-            effective_history = []
-        
-        # Track message count from session state (single source of truth)
-        current_msg_count = session.turn_count + 1
-        
-        # =====================================================================
-        # STEP 1-5: Detection Pipeline (runs on every turn)
-        # Handles: Light extraction, Risk scoring, Stage update, LLM judge
-        # =====================================================================
         detection_result = await scam_detector.detect(
             request.message.text, 
             effective_history,  # Uses guarded history, not raw request
             session_id
         )
-        
-        # Log detection result
-        print(f"[{session_id}] Turn {session.turn_count}: "
-              f"Risk={detection_result['risk_score']}, "
-              f"Stage={detection_result['scam_stage']}, "
-              f"Detected={detection_result['scamDetected']}")
-        
-        # =====================================================================
-        # STEP 6: Agent Controller - Generate response based on scam stage
-        # Agent behavior is driven by scamStage, NOT scamDetected boolean
-        # =====================================================================
-        
-        # Build intelligence object for agent
-        intel = ExtractedIntelligence(
-            upiIds=session.upi_ids.copy(),
-            bankAccounts=session.bank_accounts.copy(),
-            phoneNumbers=session.phone_numbers.copy(),
-            phishingLinks=session.phishing_links.copy(),
-            suspiciousKeywords=session.suspicious_keywords.copy(),
-        )
-        
-        # ISSUE 1 FIX: Pass guarded history, not raw request.conversationHistory
+    except Exception as e:
+        logger.exception(f"[{session_id}] Detection failed: {e}")
+        return _error_response()
+    
+    # Log detection result
+    logger.info(f"[{session_id}] Turn {session.turn_count}: "
+                f"Risk={detection_result['risk_score']}, "
+                f"Stage={detection_result['scam_stage']}, "
+                f"Detected={detection_result['scamDetected']}")
+    
+    # =====================================================================
+    # STEP 6: Agent Controller - Generate response based on scam stage
+    # Agent behavior is driven by scamStage, NOT scamDetected boolean
+    # =====================================================================
+    
+    # Session-owned intelligence object: built once per session and
+    # mutated in place by the extractor (no per-turn rebuild or sync-back)
+    intel = session.intel
+    
+    # ISSUE 1 FIX: Pass guarded history, not raw request.conversationHistory
+    try:
         reply_text = await agent_controller.generate_response(
             request.message.text,
             effective_history,
@@ -175,83 +165,81 @@ async def chat_handler(request: IncomingRequest, api_key: str = Depends(get_api_
             detection_result["scamDetected"],
             session_id
         )
+    except Exception as e:
+        logger.exception(f"[{session_id}] Response generation failed: {e}")
+        return _error_response()
+    
+    # =====================================================================
+    # STEP 7: Intelligence Extraction
+    # SAFETY: Only extract from SCAMMER messages, never from agent
+    # Light extraction (keywords) runs every turn; heavy extraction
+    # (UPI, bank, phone, URL) only at TRUST+ stages.
+    # =====================================================================
+    current_stage = detection_result["scam_stage_enum"]
+    
+    # Extract intelligence ONLY from scammer message (source attribution)
+    intelligence_extractor.extract(
+        request.message.text,
+        intel,
+        session_id,
+        scam_stage=current_stage,
+        message_source="scammer"  # CRITICAL: Explicit source attribution
+    )
+    
+    # =====================================================================
+    # STEP 8: Mission Completion Check
+    # Only send callback when mission is truly complete
+    # =====================================================================
+    if detection_result["scamDetected"] and not session.callback_sent:
+        # Pure session-state check (no LLM round-trip); call it on the
+        # session we already hold instead of awaiting a wrapper coroutine.
+        mission_complete = session.check_mission_complete()
         
-        # =====================================================================
-        # STEP 7: Heavy Intelligence Extraction (at THREAT+ stages)
-        # SAFETY: Only extract from SCAMMER messages, never from agent
-        # Light extraction already happened in detection pipeline
-        # =====================================================================
-        current_stage = ScamStage(detection_result["scam_stage"])
-        
-        # Extract intelligence ONLY from scammer message (source attribution)
-        intel = intelligence_extractor.extract(
-            request.message.text,
-            intel,
-            session_id,
-            scam_stage=current_stage,
-            message_source="scammer"  # CRITICAL: Explicit source attribution
-        )
-        
-        # Sync extracted intel back to session
-        session.upi_ids = intel.upiIds.copy()
-        session.bank_accounts = intel.bankAccounts.copy()
-        session.phone_numbers = intel.phoneNumbers.copy()
-        session.phishing_links = intel.phishingLinks.copy()
-        session.suspicious_keywords = intel.suspiciousKeywords.copy()
-        
-        # =====================================================================
-        # STEP 8: Mission Completion Check
-        # Only send callback when mission is truly complete
-        # =====================================================================
-        if detection_result["scamDetected"] and not session.callback_sent:
-            mission_complete = await agent_controller.check_mission_complete(
-                intel, session_id
+        if mission_complete:
+            session.callback_sent = True
+            
+            # Generate agent notes
+            agent_notes = agent_controller.get_agent_notes(session_id)
+            
+            # Message count from session state (single source of truth);
+            # detect() has already counted the current message.
+            current_msg_count = session.turn_count
+            
+            # Build payload
+            payload = FinalResultPayload(
+                sessionId=session_id,
+                scamDetected=True,
+                totalMessagesExchanged=current_msg_count,
+                # Snapshot: later turns keep mutating session.intel
+                extractedIntelligence=intel.model_copy(deep=True),
+                agentNotes=agent_notes
             )
             
-            if mission_complete:
-                session.callback_sent = True
-                
-                # Generate agent notes
-                agent_notes = agent_controller.get_agent_notes(session_id)
-                
-                # Build payload
-                payload = FinalResultPayload(
-                    sessionId=session_id,
-                    scamDetected=True,
-                    totalMessagesExchanged=current_msg_count,
-                    extractedIntelligence=intel,
-                    agentNotes=agent_notes
-                )
-                
-                # =========================================================
-                # ISSUE 6 FIX: NON-BLOCKING CALLBACK
-                # ---------------------------------------------------------
-                # The callback is fired in a background task so the API
-                # response is NEVER delayed or blocked by GUVI endpoint
-                # latency or failures.  Retry with exponential backoff
-                # happens inside the background task.
-                # =========================================================
-                asyncio.create_task(
-                    send_final_result_with_retry(payload, session)
-                )
-                print(f"🚀 Callback dispatched (non-blocking) for session {session_id}")
-        
-        # Return response (format unchanged)
-        return AgentResponse(
-            status="success",
-            reply=reply_text
-        )
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        print(f"Error in chat_handler: {e}")
-        import traceback
-        traceback.print_exc()
-        return AgentResponse(
-            status="error",
-            reply="I'm having trouble understanding. Could you repeat that?"
-        )
+            # =========================================================
+            # ISSUE 6 FIX: NON-BLOCKING CALLBACK
+            # ---------------------------------------------------------
+            # The callback is fired in a background task so the API
+            # response is NEVER delayed or blocked by GUVI endpoint
+            # latency or failures.  Retry with exponential backoff
+            # happens inside the background task.
+            # =========================================================
+            asyncio.create_task(
+                send_final_result_with_retry(payload, session)
+            )
+            # One log record for the whole mission summary
+            logger.info("\n".join([
+                f"🚀 Callback dispatched (non-blocking) for session {session_id}",
+                f"   Risk Score: {detection_result['risk_score']}",
+                f"   Stage: {detection_result['scam_stage']}",
+                f"   Intel: UPI={len(intel.upiIds)}, Bank={len(intel.bankAccounts)}, "
+                f"Phone={len(intel.phoneNumbers)}, Links={len(intel.phishingLinks)}",
+            ]))
+    
+    # Return response (format unchanged)
+    return AgentResponse(
+        status="success",
+        reply=reply_text
+    )
 
 
 @app.get("/health")
@@ -5,10 +5,84 @@ Combines lightweight ML with LLM for conversation-level analysis
 
 import re
 import os
+import json
+import string
 from typing import Dict, List, Tuple, Optional
 from dataclasses import dataclass
 from collections import Counter
+from functools import lru_cache
+from urllib.parse import urlparse
 import math
+import heapq
+import operator
+
+from .keyword_matcher import KeywordMatcher
+
+try:
+    import orjson
+except ImportError:  # Optional accelerator; stdlib json is the fallback
+    orjson = None
+
+# Precompiled feature patterns (compiled once at import, not per call).
+# Entity patterns stay separate: a combined alternation would let a
+# phone match consume digits that also form an Aadhaar-style number.
+NUMBER_PATTERN = re.compile(r'\d+')
+URL_PATTERN = re.compile(r'https?://\S+')
+UPI_PATTERN = re.compile(r'[a-zA-Z0-9._-]+@[a-zA-Z]{2,}')
+PHONE_PATTERN = re.compile(r'(?:\+91[\-\s]?)?[6-9]\d{9}')
+AADHAAR_PATTERN = re.compile(r'\b\d{4}\s?\d{4}\s?\d{4}\b')
+
+# Known-legitimate hosts; subdomains (www., m., netbanking.) are safe too
+SAFE_URL_HOSTS = frozenset((
+    "google.com", "facebook.com", "amazon.in", "flipkart.com",
+    "paytm.com", "sbi.co.in", "hdfcbank.com",
+))
+# Sentence punctuation that URL_PATTERN's \S+ picks up after a URL
+URL_TRAILING_PUNCTUATION = ".,;:!?)]'\""
+
+# Intent word lists (substring match, each word counted once)
+URGENCY_WORDS = ("urgent", "immediate", "now", "today", "quick", "fast", "hurry", "asap")
+THREAT_WORDS = ("block", "suspend", "arrest", "legal", "police", "jail", "fine", "penalty")
+REQUEST_WORDS = ("share", "send", "give", "provide", "transfer", "pay", "verify")
+
+# Deletes ASCII capitals; len(text) - len(text.translate(...)) counts them in C
+ASCII_UPPER_DELETE = str.maketrans('', '', string.ascii_uppercase)
+
+# Whole whitespace-delimited tokens containing a repetition stem
+# (urgent, block, suspend, otp, verify); only these tokens are counted
+REPETITION_TOKEN_PATTERN = re.compile(r'(?<!\S)\S*?(?:urgent|block|suspend|otp|verify)\S*')
+
+# History-free feature extraction is memoized for messages up to this
+# length (template messages repeat across turns and sessions)
+FEATURE_CACHE_MAX_TEXT_LEN = 256
+FEATURE_CACHE_SIZE = 2048
+
+# Fixed feature-vector layout; extract_features() always fills every key
+FEATURE_ORDER = (
+    "ngram_score", "ngram_count", "length", "word_count", "avg_word_length",
+    "exclamation_count", "question_count", "caps_ratio", "number_count",
+    "long_number_count", "url_count", "has_suspicious_url", "has_upi_pattern",
+    "has_phone_pattern", "has_aadhaar_pattern", "urgency_score", "threat_score",
+    "request_score"
+)
+_get_feature_values = operator.itemgetter(*FEATURE_ORDER)
+
+def is_safe_url(url: str) -> bool:
+    """
+    True if the URL's hostname is a SAFE_URL_HOSTS domain or a subdomain
+    of one. Only the parsed host is checked, so "google" in a path or a
+    lookalike host (google.com.evil.tk) does not count as safe. Trailing
+    sentence punctuation ("https://google.com,") and a trailing root dot
+    on the host are ignored.
+    """
+    try:
+        host = urlparse(url.rstrip(URL_TRAILING_PUNCTUATION)).hostname or ""
+    except ValueError:  # Malformed URL (e.g. broken IPv6 literal)
+        return False
+    host = host.rstrip(".")
+    labels = host.split(".")
+    # host itself and each parent domain: one set lookup per label
+    return any(".".join(labels[i:]) in SAFE_URL_HOSTS for i in range(len(labels)))
 
 @dataclass
 class MLPrediction:
@@ -23,6 +97,8 @@ class FeatureExtractor:
     
     def __init__(self):
         self._init_feature_weights()
+        # Per-instance memo (process lifetime) for history-free extraction
+        self._extract_cached = lru_cache(maxsize=FEATURE_CACHE_SIZE)(self._extract_features)
     
     def _init_feature_weights(self):
         """Initialize feature importance weights based on domain knowledge"""
@@ -99,78 +175,123 @@ class FeatureExtractor:
             "feel free to": -1.0,
             "happy to help": -1.5,
         }
+        
+        # One automaton over the ngrams above plus the module-level intent
+        # words, so each message is scanned once instead of once per literal
+        self.matcher = KeywordMatcher(
+            (*self.scam_ngrams, *self.safe_ngrams, *URGENCY_WORDS, *THREAT_WORDS, *REQUEST_WORDS)
+        )
+        
+        # Per-keyword data aligned with matcher ids (the automaton is a
+        # trie; ids index these tuples directly, no string-keyed lookups):
+        # (scam_weight | None, safe_weight | None, is_urgency, is_threat, is_request)
+        urgency, threat, request = map(frozenset, (URGENCY_WORDS, THREAT_WORDS, REQUEST_WORDS))
+        self._keyword_info = tuple(
+            (
+                self.scam_ngrams.get(kw),
+                self.safe_ngrams.get(kw),
+                kw in urgency,
+                kw in threat,
+                kw in request,
+            )
+            for kw in self.matcher.keywords
+        )
+    
+    def ngram_score(self, text_lower: str) -> float:
+        """Sum of scam-ngram weights present in an already-lowercased text"""
+        score = 0.0
+        for idx in self.matcher.find_ids(text_lower):
+            weight = self._keyword_info[idx][0]
+            if weight is not None:
+                score += weight
+        return score
+    
+    def extract_features(
+        self,
+        text: str,
+        conversation_history: List[str] = None
+    ) -> Tuple[Dict[str, float], List[str]]:
+        """
+        Extract features from text for classification.
+        
+        Short messages without history are served from an LRU cache;
+        callers get fresh copies so cached entries are never mutated.
+        """
+        if not conversation_history and len(text) <= FEATURE_CACHE_MAX_TEXT_LEN:
+            features, triggered_ngrams = self._extract_cached(text)
+            return dict(features), list(triggered_ngrams)
+        return self._extract_features(text, conversation_history)
     
-    def extract_features(self, text: str, conversation_history: List[str] = None) -> Dict[str, float]:
-        """Extract features from text for classification"""
+    def _extract_features(
+        self,
+        text: str,
+        conversation_history: List[str] = None
+    ) -> Tuple[Dict[str, float], List[str]]:
+        """Uncached feature extraction (see extract_features)"""
         features = {}
         text_lower = text.lower()
         
-        # 1. N-gram features
+        # 1. N-gram features (single automaton pass; hits come back in
+        # insertion order: scam ngrams, safe ngrams, then intent words)
         ngram_score = 0.0
         triggered_ngrams = []
+        urgency_hits = threat_hits = request_hits = 0
         
-        for ngram, weight in self.scam_ngrams.items():
-            if ngram in text_lower:
-                ngram_score += weight
-                triggered_ngrams.append(ngram)
-        
-        for ngram, weight in self.safe_ngrams.items():
-            if ngram in text_lower:
-                ngram_score += weight  # weight is negative
+        for idx in self.matcher.find_ids(text_lower):
+            scam_weight, safe_weight, is_urgency, is_threat, is_request = self._keyword_info[idx]
+            if scam_weight is not None:
+                ngram_score += scam_weight
+                triggered_ngrams.append(self.matcher.keywords[idx])
+            elif safe_weight is not None:
+                ngram_score += safe_weight  # weight is negative
+            urgency_hits += is_urgency
+            threat_hits += is_threat
+            request_hits += is_request
         
         features["ngram_score"] = ngram_score
         features["ngram_count"] = len(triggered_ngrams)
         
-        # 2. Lexical features
+        # 2. Lexical features (tokenize once)
+        words = text.split()
         features["length"] = len(text)
-        features["word_count"] = len(text.split())
-        features["avg_word_length"] = sum(len(w) for w in text.split()) / max(len(text.split()), 1)
+        features["word_count"] = len(words)
+        features["avg_word_length"] = sum(map(len, words)) / max(len(words), 1)
         
         # 3. Punctuation features
         features["exclamation_count"] = text.count("!")
         features["question_count"] = text.count("?")
-        features["caps_ratio"] = sum(1 for c in text if c.isupper()) / max(len(text), 1)
+        if text.isascii():
+            caps = len(text) - len(text.translate(ASCII_UPPER_DELETE))
+        else:
+            caps = sum(map(str.isupper, text))  # Unicode-aware fallback
+        features["caps_ratio"] = caps / max(len(text), 1)
         
         # 4. Number features
-        numbers = re.findall(r'\d+', text)
+        numbers = NUMBER_PATTERN.findall(text)
         features["number_count"] = len(numbers)
         features["long_number_count"] = sum(1 for n in numbers if len(n) >= 6)  # Potential account/phone numbers
         
         # 5. URL/link features
-        urls = re.findall(r'https?://\S+', text)
+        urls = URL_PATTERN.findall(text)
         features["url_count"] = len(urls)
-        features["has_suspicious_url"] = 1.0 if any(
-            not any(safe in url for safe in ["google", "facebook", "amazon", "flipkart", "paytm", "sbi", "hdfc"])
-            for url in urls
-        ) else 0.0
+        features["has_suspicious_url"] = 1.0 if not all(map(is_safe_url, urls)) else 0.0
         
         # 6. Entity features
-        features["has_upi_pattern"] = 1.0 if re.search(r'[a-zA-Z0-9._-]+@[a-zA-Z]{2,}', text) else 0.0
-        features["has_phone_pattern"] = 1.0 if re.search(r'(?:\+91[\-\s]?)?[6-9]\d{9}', text) else 0.0
-        features["has_aadhaar_pattern"] = 1.0 if re.search(r'\b\d{4}\s?\d{4}\s?\d{4}\b', text) else 0.0
-        
-        # 7. Sentiment/intent features (simple heuristics)
-        urgency_words = ["urgent", "immediate", "now", "today", "quick", "fast", "hurry", "asap"]
-        threat_words = ["block", "suspend", "arrest", "legal", "police", "jail", "fine", "penalty"]
-        request_words = ["share", "send", "give", "provide", "transfer", "pay", "verify"]
+        features["has_upi_pattern"] = 1.0 if UPI_PATTERN.search(text) else 0.0
+        features["has_phone_pattern"] = 1.0 if PHONE_PATTERN.search(text) else 0.0
+        features["has_aadhaar_pattern"] = 1.0 if AADHAAR_PATTERN.search(text) else 0.0
         
-        features["urgency_score"] = sum(1 for w in urgency_words if w in text_lower) * 0.5
-        features["threat_score"] = sum(1 for w in threat_words if w in text_lower) * 0.7
-        features["request_score"] = sum(1 for w in request_words if w in text_lower) * 0.5
+        # 7. Sentiment/intent features (simple heuristics, counted above)
+        features["urgency_score"] = urgency_hits * 0.5
+        features["threat_score"] = threat_hits * 0.7
+        features["request_score"] = request_hits * 0.5
         
         # 8. Conversation-level features (if history provided)
         if conversation_history:
-            all_text = " ".join(conversation_history) + " " + text
             features["conversation_length"] = len(conversation_history)
             
             # Check for escalation pattern
-            history_scores = []
-            for msg in conversation_history:
-                msg_score = sum(
-                    weight for ngram, weight in self.scam_ngrams.items() 
-                    if ngram in msg.lower()
-                )
-                history_scores.append(msg_score)
+            history_scores = [self.ngram_score(msg.lower()) for msg in conversation_history]
             
             if len(history_scores) >= 2:
                 # Check if scores are increasing (escalation)
@@ -182,28 +303,24 @@ class FeatureExtractor:
             else:
                 features["escalation_ratio"] = 0.0
             
-            # Repetition detection
-            all_msgs = conversation_history + [text]
-            word_counts = Counter(" ".join(all_msgs).lower().split())
-            repeated_scam_words = sum(
-                count for word, count in word_counts.items()
-                if any(ngram in word for ngram in ["urgent", "block", "suspend", "otp", "verify"])
-                and count > 1
-            )
+            # Repetition detection over one joined, lowercased string (no
+            # intermediate history + [text] list). Count only tokens
+            # containing a scam stem, not the whole vocabulary.
+            joined_lower = (" ".join(conversation_history) + " " + text).lower()
+            word_counts = Counter(REPETITION_TOKEN_PATTERN.findall(joined_lower))
+            repeated_scam_words = sum(count for count in word_counts.values() if count > 1)
             features["scam_word_repetition"] = repeated_scam_words
         
         return features, triggered_ngrams
     
     def get_feature_vector(self, features: Dict[str, float]) -> List[float]:
         """Convert feature dict to vector for ML model"""
-        feature_order = [
-            "ngram_score", "ngram_count", "length", "word_count", "avg_word_length",
-            "exclamation_count", "question_count", "caps_ratio", "number_count",
-            "long_number_count", "url_count", "has_suspicious_url", "has_upi_pattern",
-            "has_phone_pattern", "has_aadhaar_pattern", "urgency_score", "threat_score",
-            "request_score"
-        ]
-        return [features.get(f, 0.0) for f in feature_order]
+        try:
+            # One C-level itemgetter call for complete dicts
+            return list(_get_feature_values(features))
+        except KeyError:
+            # Partial dicts: missing features default to 0.0
+            return [features.get(f, 0.0) for f in FEATURE_ORDER]
 
 
 class LightweightMLDetector:
@@ -234,10 +351,19 @@ class LightweightMLDetector:
             "caps_ratio": 0.02,
         }
         
+        # Weights frozen into an aligned tuple so predict() computes the
+        # weighted sum with one itemgetter + map instead of a dict loop
+        self._weight_values = tuple(self.weights.values())
+        self._get_weighted_features = operator.itemgetter(*self.weights)
+        
         self.bias = -0.3  # Baseline threshold
         self.scam_threshold = 0.5
     
-    def predict(self, text: str, conversation_history: List[str] = None) -> MLPrediction:
+    def predict(
+        self,
+        text: str,
+        conversation_history: List[str] = None
+    ) -> MLPrediction:
         """
         Predict if message/conversation is a scam.
         Returns prediction with confidence and explanation.
@@ -246,11 +372,11 @@ class LightweightMLDetector:
             text, conversation_history
         )
         
-        # Calculate weighted score
-        score = self.bias
-        for feature, weight in self.weights.items():
-            if feature in features:
-                score += features[feature] * weight
+        # Calculate weighted score (same summation order as bias + Σ w·f)
+        score = sum(
+            map(operator.mul, self._get_weighted_features(features), self._weight_values),
+            self.bias
+        )
         
         # Apply sigmoid for probability
         probability = 1 / (1 + math.exp(-score * 2))
@@ -259,12 +385,11 @@ class LightweightMLDetector:
         is_scam = probability >= self.scam_threshold
         
         # Generate explanation
-        top_features = sorted(
-            [(f, features.get(f, 0) * self.weights.get(f, 0)) 
-             for f in self.weights.keys()],
-            key=lambda x: x[1],
-            reverse=True
-        )[:5]
+        top_features = heapq.nlargest(
+            5,
+            ((f, features.get(f, 0) * w) for f, w in self.weights.items()),
+            key=lambda x: x[1]
+        )
         
         explanation_parts = []
         if triggered_ngrams:
@@ -292,27 +417,33 @@ class LightweightMLDetector:
                 explanation="No messages to analyze"
             )
         
-        # Analyze each message and aggregate
-        all_predictions = []
+        # Analyze each message and aggregate in the same pass. The model
+        # weights only per-message features (conversation-level features
+        # carry no weight), so each message is scored without its history
+        # slice; that also lets repeated turns hit the feature cache.
         all_features = []
+        max_confidence = 0.0
+        total_confidence = 0.0
+        scam_predictions = 0
         
-        for i, msg in enumerate(messages):
-            history = messages[:i] if i > 0 else None
-            pred = self.predict(msg, history)
-            all_predictions.append(pred)
+        for msg in messages:
+            pred = self.predict(msg)
             all_features.extend(pred.features_triggered)
+            
+            # Running max / sum / scam count (no second pass over predictions)
+            if pred.confidence > max_confidence:
+                max_confidence = pred.confidence
+            total_confidence += pred.confidence
+            if pred.is_scam:
+                scam_predictions += 1
         
-        # Aggregate predictions
-        # Use max confidence and combine features
-        max_confidence = max(p.confidence for p in all_predictions)
-        avg_confidence = sum(p.confidence for p in all_predictions) / len(all_predictions)
+        avg_confidence = total_confidence / len(messages)
         
         # Weight towards max but consider average
         final_confidence = 0.7 * max_confidence + 0.3 * avg_confidence
         
         # Bonus for consistent scam indicators
-        scam_predictions = sum(1 for p in all_predictions if p.is_scam)
-        if scam_predictions >= len(all_predictions) * 0.5:
+        if scam_predictions >= len(messages) * 0.5:
             final_confidence = min(1.0, final_confidence * 1.1)
         
         unique_features = list(set(all_features))
@@ -325,6 +456,41 @@ class LightweightMLDetector:
         )
 
 
+# First ```/```json fence in an LLM JSON reply (closing fence optional)
+JSON_FENCE_PATTERN = re.compile(r'```(?:json)?(.*?)(?:```|$)', re.DOTALL)
+
+
+def parse_llm_json(text: str) -> Dict:
+    """Strip an optional markdown code fence and parse the JSON reply."""
+    text = text.strip()
+    fenced = JSON_FENCE_PATTERN.search(text)
+    if fenced:
+        text = fenced.group(1)
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+# One AsyncGroq client (one HTTP connection pool) for every LLM caller in
+# the process: the intent classifier here and the reasoning judge in
+# scam_detector. Created on first use so importing this module stays cheap.
+_groq_client = None
+
+
+def get_groq_client():
+    """Return the shared AsyncGroq client, creating it on first use."""
+    global _groq_client
+    if _groq_client is None:
+        from groq import AsyncGroq
+        _groq_client = AsyncGroq(api_key=os.getenv("GROQ_API_KEY"))
+    return _groq_client
+
+
+# Kept byte-identical across calls so the provider can reuse its prompt
+# cache for this prefix; per-message context goes in the user turn only
+INTENT_SYSTEM_PROMPT = "You are a scam detection expert. Analyze messages for fraud indicators. Return only valid JSON."
+
+
 class LLMIntentClassifier:
     """
     LLM-based intent classification for contextual understanding.
@@ -343,8 +509,7 @@ class LLMIntentClassifier:
             return {"intent": "unknown", "confidence": 0.0, "error": "No API key"}
         
         try:
-            from groq import AsyncGroq
-            client = AsyncGroq(api_key=self.groq_api_key)
+            client = get_groq_client()
             
             # Build context
             context = ""
@@ -364,27 +529,14 @@ Respond in this exact JSON format only:
             response = await client.chat.completions.create(
                 model="llama-3.1-8b-instant",
                 messages=[
-                    {
-                        "role": "system",
-                        "content": "You are a scam detection expert. Analyze messages for fraud indicators. Return only valid JSON."
-                    },
+                    {"role": "system", "content": INTENT_SYSTEM_PROMPT},
                     {"role": "user", "content": prompt}
                 ],
                 temperature=0.1,
                 max_tokens=300
             )
             
-            result_text = response.choices[0].message.content.strip()
-            
-            # Parse JSON response
-            import json
-            # Clean up response if needed
-            if result_text.startswith("```"):
-                result_text = result_text.split("```")[1]
-                if result_text.startswith("json"):
-                    result_text = result_text[4:]
-            
-            result = json.loads(result_text)
+            result = parse_llm_json(response.choices[0].message.content)
             return {
                 "intent": result.get("intent", "unclear"),
                 "confidence": result.get("scam_probability", 0.5),
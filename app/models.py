@@ -1,17 +1,23 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import List, Optional, Literal
 
+# Inbound request models are read-only once validated
+REQUEST_MODEL_CONFIG = ConfigDict(frozen=True, extra='ignore')
+
 class Message(BaseModel):
+    model_config = REQUEST_MODEL_CONFIG
     sender: Literal["scammer", "user"]  # scammer or user
     text: str  # Message content
     timestamp: int  # Epoch time format in ms
 
 class Metadata(BaseModel):
+    model_config = REQUEST_MODEL_CONFIG
     channel: Optional[str] = None  # SMS / WhatsApp / Email / Chat
     language: Optional[str] = None  # Language used
     locale: Optional[str] = None  # Country or region
 
 class IncomingRequest(BaseModel):
+    model_config = REQUEST_MODEL_CONFIG
     sessionId: str  # Unique session identifier
     message: Message  # The latest incoming message (Required)
     conversationHistory: List[Message] = []  # Previous messages (Empty for first message, Required for follow-up)
@@ -22,6 +28,7 @@ class AgentResponse(BaseModel):
     reply: str  # AI agent's human-like response
 
 class ExtractedIntelligence(BaseModel):
+    # Mutable on purpose: owned by SessionState and appended to in place
     bankAccounts: List[str] = Field(default_factory=list)
     upiIds: List[str] = Field(default_factory=list)
     phishingLinks: List[str] = Field(default_factory=list)
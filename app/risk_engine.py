@@ -21,17 +21,76 @@ This ensures bounded, predictable scoring.
 """
 
 import re
+import sys
 import logging
-from typing import Dict, List, Tuple, Optional
+from array import array
+from typing import Deque, Dict, List, Tuple, Optional
+from collections import OrderedDict, deque
+from itertools import islice
 from dataclasses import dataclass, field
 from enum import Enum
 from datetime import datetime
+from functools import lru_cache
+from bisect import bisect_right
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+from .models import ExtractedIntelligence
+from .keyword_matcher import KeywordMatcher
+
+# analyze_message memoizes rule matching for messages up to this length
+ANALYSIS_CACHE_MAX_TEXT_LEN = 1024
+ANALYSIS_CACHE_SIZE = 4096
+
+# ML confidence → signal score buckets (apply_ml_score, after the 0.6 floor)
+ML_CONFIDENCE_CUTOFFS = (0.7, 0.8, 0.9)
+ML_CONFIDENCE_SCORES = (8, 12, 18, 25)
+
+# Memory bounds for long-running servers
+MAX_SESSIONS = 10_000          # LRU-evicted beyond this
+MAX_LLM_JUDGEMENTS = 200       # Per session, oldest dropped
+MAX_STAGE_HISTORY = 64         # Per session, oldest dropped
+MAX_CONVERSATION_TURNS = 64    # Per session, oldest dropped
+MAX_RECENT_QUESTIONS = 5       # Anti-loop window of agent questions
+MAX_SCAMMER_INTENTS = 5        # Recent scammer intents kept
+
+# High-volume dataclasses use __slots__ where supported (Python 3.10+)
+DATACLASS_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+# Module logger; handlers/levels are configured by the app (main.py)
 logger = logging.getLogger(__name__)
 
 
+# ==============================================================================
+# LANGUAGE DETECTION (used once per session, on the first scammer message)
+# ==============================================================================
+
+DEVANAGARI_PATTERN = re.compile(r'[\u0900-\u097F]')
+
+HINDI_WORDS = (
+    'kya', 'hai', 'hain', 'mujhe', 'aap', 'aapka', 'hoon',
+    'nahi', 'bhai', 'beta', 'ji', 'accha', 'theek', 'batao',
+    'bhejo', 'abhi', 'madad', 'mera', 'naam', 'aapke', 'karo',
+    'karna', 'hoga', 'padega', 'dijiye', 'kijiye', 'bolo',
+    'suno', 'dekho', 'jaldi', 'turant', 'paise', 'rupay',
+)
+HINDI_WORD_MATCHER = KeywordMatcher(HINDI_WORDS)
+
+
+def detect_language(text: str) -> str:
+    """
+    Detect Hindi vs English from the scammer's message.
+    
+    - Devanagari script → definitely Hindi
+    - 2+ romanized Hindi words → Hindi
+    - Otherwise → English
+    """
+    if DEVANAGARI_PATTERN.search(text):
+        return "hindi"
+    text_lower = text.lower()
+    if len(HINDI_WORD_MATCHER.find_ids(text_lower)) >= 2:
+        return "hindi"
+    return "english"
+
+
 class ScamStage(str, Enum):
     """Explicit scam progression stages: HOOK → TRUST → THREAT → ACTION"""
     NORMAL = "NORMAL"
@@ -42,6 +101,31 @@ class ScamStage(str, Enum):
     CONFIRMED = "CONFIRMED"
 
 
+# Risk thresholds (see module docstring); plain module constants so the
+# per-signal threshold check reads globals, not dict/attribute lookups
+THRESHOLD_SUSPICIOUS = 25
+THRESHOLD_THREAT = 50
+THRESHOLD_CONFIRMED = 70
+
+# Stage ordering for "only move forward" checks
+STAGE_PRIORITY: Dict[ScamStage, int] = {
+    ScamStage.NORMAL: 0,
+    ScamStage.HOOK: 1,
+    ScamStage.TRUST: 2,
+    ScamStage.THREAT: 3,
+    ScamStage.ACTION: 4,
+    ScamStage.CONFIRMED: 5,
+}
+
+# Stage pattern name -> stage it suggests (update_stage_from_patterns)
+PATTERN_STAGE_MAP: Dict[str, ScamStage] = {
+    "greeting": ScamStage.HOOK, "introduction": ScamStage.HOOK, "authority_claim": ScamStage.HOOK,
+    "verification": ScamStage.TRUST, "procedure": ScamStage.TRUST, "credibility": ScamStage.TRUST,
+    "urgency": ScamStage.THREAT, "consequence": ScamStage.THREAT, "fear": ScamStage.THREAT,
+    "payment_request": ScamStage.ACTION, "otp_request": ScamStage.ACTION, "link_share": ScamStage.ACTION,
+}
+
+
 class EmotionalState(str, Enum):
     """Dynamic emotional states for agent persona"""
     NEUTRAL = "neutral"
@@ -53,6 +137,22 @@ class EmotionalState(str, Enum):
     COMPLIANT = "compliant"
 
 
+# Persona emotion for each stage (_update_persona_for_stage)
+STAGE_EMOTIONS: Dict[ScamStage, EmotionalState] = {
+    ScamStage.NORMAL: EmotionalState.NEUTRAL,
+    ScamStage.HOOK: EmotionalState.CONFUSED,
+    ScamStage.TRUST: EmotionalState.CONCERNED,
+    ScamStage.THREAT: EmotionalState.ANXIOUS,
+    ScamStage.ACTION: EmotionalState.SCARED,
+    ScamStage.CONFIRMED: EmotionalState.COMPLIANT,
+}
+
+# Stages at which the persona grows more compliant, and by how much per
+# transition into one of them
+COMPLIANCE_STAGES = frozenset({ScamStage.THREAT, ScamStage.ACTION, ScamStage.CONFIRMED})
+COMPLIANCE_STEP = 0.15
+
+
 class SignalCategory(str, Enum):
     """Categories of risk signals"""
     URGENCY = "urgency"
@@ -70,7 +170,7 @@ class SignalCategory(str, Enum):
     LLM_DETECTION = "llm_detection"
 
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class TriggeredSignal:
     """Individual signal triggered in a turn"""
     signal_type: str
@@ -80,10 +180,12 @@ class TriggeredSignal:
     source: str  # "rule", "ml", "llm"
     turn_number: int
     description: str = ""
-    timestamp: datetime = field(default_factory=datetime.now)
+    # Position in the session's signal history (set by add_signal); an
+    # ordering key instead of a per-signal datetime.now() call
+    sequence: int = 0
 
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class LLMJudgement:
     """LLM reasoning output for a turn"""
     turn_number: int
@@ -97,7 +199,7 @@ class LLMJudgement:
     timestamp: datetime = field(default_factory=datetime.now)
 
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class AgentMemory:
     """
     AGENT MEMORY OBJECT - Built on every turn for context awareness.
@@ -167,7 +269,7 @@ class AgentMemory:
         return " | ".join(parts)
 
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class PersonaState:
     """Dynamic persona state that drifts during conversation"""
     base_persona: str = "middle-class Indian citizen"
@@ -184,7 +286,7 @@ class PersonaState:
         self.compliance_level = min(1.0, self.compliance_level + amount)
 
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class HardRule:
     """Hard rule that immediately confirms scam"""
     name: str
@@ -192,9 +294,83 @@ class HardRule:
     score: int
     category: SignalCategory
     description: str
+    # Casefolded literals of which at least one occurs in ANY match of
+    # pattern (the rule's leading/required words), as seen in
+    # anchor_fold(text). Empty = always search.
+    anchors: Tuple[str, ...] = ()
+
+
+# Non-ASCII chars that IGNORECASE matches to an ASCII letter but that
+# casefold() does not map onto it (dotted/dotless i, long s, Kelvin sign)
+ANCHOR_FOLD_TABLE = str.maketrans({
+    "\u0130": "i", "\u0131": "i", "\u017f": "s", "\u212a": "k",
+})
 
 
-@dataclass
+def anchor_fold(text: str) -> str:
+    """
+    Fold text for the RuleGate anchor scan.
+    
+    casefold() alone turns 'İ' into 'i̇' and leaves 'ı' as is, while the
+    IGNORECASE rule regexes match both as 'i'; without the table,
+    "İnstall anydesk" would skip rules that still match it.
+    """
+    if text.isascii():
+        return text.lower()
+    return text.translate(ANCHOR_FOLD_TABLE).casefold()
+
+
+class RuleGate:
+    """
+    Anchor prefilter for a list of regex rules.
+    
+    One KeywordMatcher pass over the anchor-folded message finds which
+    anchor literals are present; only rules with a present anchor (or
+    with no anchors) can match, so only those regexes are run. Python's
+    re has no multi-pattern literal prefilter of its own: a combined
+    alternation costs as much as searching every rule separately.
+    """
+    
+    def __init__(self, anchor_sets: List[Tuple[str, ...]]):
+        self._always = [idx for idx, anchors in enumerate(anchor_sets) if not anchors]
+        self._matcher = KeywordMatcher(a for anchors in anchor_sets for a in anchors)
+        anchor_ids = {a: idx for idx, a in enumerate(self._matcher.keywords)}
+        self._rules_by_anchor: List[List[int]] = [[] for _ in anchor_ids]
+        for rule_idx, anchors in enumerate(anchor_sets):
+            for a in dict.fromkeys(anchors):
+                self._rules_by_anchor[anchor_ids[a]].append(rule_idx)
+    
+    def candidates(self, text_folded: str) -> List[int]:
+        """Indices of rules that may match text (ascending)"""
+        hit = set(self._always)
+        for anchor_id in self._matcher.find_ids(text_folded):
+            hit.update(self._rules_by_anchor[anchor_id])
+        return sorted(hit)
+
+
+# Escapes that can spell a letter (\x41, \u0041, \N{...}, octal) and any escape
+_LETTER_ESCAPE_PATTERN = re.compile(r'\\[xuUN0-7]')
+_ESCAPE_PATTERN = re.compile(r'\\.', re.DOTALL)
+
+
+def lowercase_variant(pattern: "re.Pattern") -> Optional["re.Pattern"]:
+    """
+    Case-sensitive twin of an IGNORECASE rule pattern.
+    
+    On ASCII text, IGNORECASE only equates letter cases, so a pattern with
+    no uppercase literals matches text.lower() exactly as the original
+    matches text, without the slower case-folding match loop. Returns
+    None when the pattern does not qualify; callers keep the original.
+    """
+    source = pattern.pattern
+    if not pattern.flags & re.IGNORECASE or _LETTER_ESCAPE_PATTERN.search(source):
+        return None
+    if any(c.isupper() for c in _ESCAPE_PATTERN.sub('', source)):
+        return None
+    return re.compile(source, pattern.flags & ~re.IGNORECASE)
+
+
+@dataclass(**DATACLASS_SLOTS)
 class SoftRule:
     """Soft rule that contributes to cumulative score"""
     name: str
@@ -202,6 +378,21 @@ class SoftRule:
     score: int
     category: SignalCategory
     description: str
+    
+    def __post_init__(self):
+        # Lowercase once here; matching runs against lowercased messages
+        self.keywords = [kw.lower() for kw in self.keywords]
+
+
+# Signal types that count as a direct demand (check_mission_complete)
+ACTION_SIGNAL_TYPES = frozenset({
+    SignalCategory.FINANCIAL.value,
+    SignalCategory.OTP_REQUEST.value,
+    SignalCategory.PAYMENT_REQUEST.value,
+})
+
+# signal_type of the per-turn ML signal (apply_ml_score)
+ML_DETECTION_SIGNAL_TYPE = SignalCategory.ML_DETECTION.value
 
 
 class SessionState:
@@ -226,25 +417,31 @@ class SessionState:
         # Core detection state
         self.risk_score: int = 0
         self.scam_stage: ScamStage = ScamStage.NORMAL
+        self.scam_stage_value: str = self.scam_stage.value  # Kept in sync by _transition_stage
         self.scam_detected: bool = False
         self.hard_rule_triggered: bool = False
         
         # Turn tracking
         self.turn_count: int = 0
         
-        # Signal history
-        self.triggered_signals: List[TriggeredSignal] = []
-        self.signals_by_turn: Dict[int, List[TriggeredSignal]] = {}
+        # Signal history, stored column-wise (one list/array per field)
+        # instead of one TriggeredSignal object per signal; objects are
+        # rebuilt on demand by triggered_signals / signals_by_turn
+        self._sig_types: List[str] = []
+        self._sig_names: List[str] = []
+        self._sig_scores = array('i')
+        self._sig_hard = bytearray()
+        self._sig_sources: List[str] = []
+        self._sig_turns = array('i')
+        self._sig_descriptions: List[str] = []
+        self.action_signal_count: int = 0  # Running count, see add_signal
         
         # LLM judgement history
-        self.llm_judgements: List[LLMJudgement] = []
+        self.llm_judgements: Deque[LLMJudgement] = deque(maxlen=MAX_LLM_JUDGEMENTS)
         
-        # Intelligence extraction
-        self.upi_ids: List[str] = []
-        self.bank_accounts: List[str] = []
-        self.phone_numbers: List[str] = []
-        self.phishing_links: List[str] = []
-        self.suspicious_keywords: List[str] = []
+        # Intelligence extraction - one object per session, mutated in
+        # place by the extractor; upi_ids etc. below are views onto it
+        self.intel: ExtractedIntelligence = ExtractedIntelligence()
         
         # Persona state
         self.persona_state: PersonaState = PersonaState()
@@ -254,7 +451,7 @@ class SessionState:
         self.callback_sent: bool = False
         
         # Stage history
-        self.stage_history: List[tuple] = []
+        self.stage_history: Deque[tuple] = deque(maxlen=MAX_STAGE_HISTORY)
         self.created_at: datetime = datetime.now()
         
         # ===================================================================
@@ -265,7 +462,7 @@ class SessionState:
         # ===================================================================
         # NEW: Anti-loop tracking - prevents repetitive questions
         # ===================================================================
-        self.recent_questions: List[str] = []  # Last N agent questions
+        self.recent_questions: Deque[str] = deque(maxlen=MAX_RECENT_QUESTIONS)  # Last N agent questions
         self.question_intents: Dict[str, int] = {}  # intent -> count (max 2)
         
         # ===================================================================
@@ -283,8 +480,69 @@ class SessionState:
         # ===================================================================
         # NEW: Conversation history tracking - for memory/context
         # ===================================================================
-        self.conversation_turns: List[Dict] = []  # Full turn history
-        self.last_scammer_intents: List[str] = []  # What scammer asked for
+        self.conversation_turns: Deque[Dict] = deque(maxlen=MAX_CONVERSATION_TURNS)  # Recent turn window
+        self.last_scammer_intents: Deque[str] = deque(maxlen=MAX_SCAMMER_INTENTS)  # What scammer asked for
+    
+    # ===================================================================
+    # SIGNAL HISTORY VIEWS (backed by the _sig_* columns)
+    # ===================================================================
+    
+    @property
+    def signal_count(self) -> int:
+        return len(self._sig_scores)
+    
+    @property
+    def triggered_signals(self) -> List[TriggeredSignal]:
+        """All signals in arrival order, materialized from the columns"""
+        return [
+            TriggeredSignal(
+                signal_type=signal_type,
+                signal_name=signal_name,
+                score=score,
+                is_hard_rule=bool(is_hard),
+                source=source,
+                turn_number=turn_number,
+                description=description,
+                sequence=sequence,
+            )
+            for sequence, (signal_type, signal_name, score, is_hard, source, turn_number, description)
+            in enumerate(zip(
+                self._sig_types, self._sig_names, self._sig_scores, self._sig_hard,
+                self._sig_sources, self._sig_turns, self._sig_descriptions,
+            ))
+        ]
+    
+    @property
+    def signals_by_turn(self) -> Dict[int, List[TriggeredSignal]]:
+        """Signals grouped by turn number (built on demand)"""
+        by_turn: Dict[int, List[TriggeredSignal]] = {}
+        for signal in self.triggered_signals:
+            by_turn.setdefault(signal.turn_number, []).append(signal)
+        return by_turn
+    
+    # ===================================================================
+    # INTELLIGENCE VIEWS (backed by self.intel)
+    # ===================================================================
+    
+    @property
+    def upi_ids(self) -> List[str]:
+        return self.intel.upiIds
+    
+    @property
+    def bank_accounts(self) -> List[str]:
+        return self.intel.bankAccounts
+    
+    @property
+    def phone_numbers(self) -> List[str]:
+        return self.intel.phoneNumbers
+    
+    @property
+    def phishing_links(self) -> List[str]:
+        return self.intel.phishingLinks
+    
+    @property
+    def suspicious_keywords(self) -> List[str]:
+        return self.intel.suspiciousKeywords
     
     # ===================================================================
     # LANGUAGE LOCKING METHODS
@@ -314,10 +572,8 @@ class SessionState:
         - Stores last 5 questions for similarity check
         - Tracks intent count (max 2 per intent)
         """
-        # Keep only last 5 questions
+        # Keep only last 5 questions (bounded deque drops the oldest)
         self.recent_questions.append(question.lower().strip())
-        if len(self.recent_questions) > 5:
-            self.recent_questions.pop(0)
         
         # Track intent count
         self.question_intents[intent] = self.question_intents.get(intent, 0) + 1
@@ -446,8 +702,6 @@ class SessionState:
         # Track scammer intents separately
         if sender == "scammer" and intent:
             self.last_scammer_intents.append(intent)
-            if len(self.last_scammer_intents) > 5:
-                self.last_scammer_intents.pop(0)
     
     def get_conversation_summary(self, max_turns: int = 5) -> str:
         """
@@ -458,7 +712,8 @@ class SessionState:
         if not self.conversation_turns:
             return "First message in conversation."
         
-        recent = self.conversation_turns[-max_turns:]
+        turns = self.conversation_turns
+        recent = islice(turns, max(len(turns) - max_turns, 0), None)
         summary_parts = []
         
         for turn in recent:
@@ -526,7 +781,7 @@ class SessionState:
             intelligence_extracted=self.get_extracted_intelligence_dict(),
             missing_intelligence=self.get_missing_intelligence(),
             scam_detected=self.scam_detected,
-            current_stage=self.scam_stage.value,
+            current_stage=self.scam_stage_value,
             risk_score=self.risk_score,
             reply_language=self.locked_language or "hindi",
             is_stalled=self.check_stall(),
@@ -549,11 +804,10 @@ class SessionState:
         # BOUNDED: Clamp to maximum 100
         self.risk_score = min(self.risk_score + score, 100)
         
-        # Log the change for explainability
-        if reason:
-            logger.info(
-                f"📊 Risk: {old_score} → {self.risk_score} (+{score}) | {reason}"
-            )
+        # Log the change for explainability (formatted only if INFO is on;
+        # this runs for every signal on every turn)
+        if reason and logger.isEnabledFor(logging.INFO):
+            logger.info("📊 Risk: %d → %d (+%d) | %s", old_score, self.risk_score, score, reason)
         
         self._check_risk_thresholds()
     
@@ -567,14 +821,16 @@ class SessionState:
         - 50-69:  THREAT  (confirmed tactics)
         - 70-100: CONFIRMED (definitive scam)
         """
-        if self.risk_score >= 70:
+        risk_score = self.risk_score
+        if risk_score >= THRESHOLD_CONFIRMED:
             if self.scam_stage != ScamStage.CONFIRMED:
                 self._transition_stage(ScamStage.CONFIRMED)
             self.scam_detected = True
-        elif self.risk_score >= 50:
-            if self.scam_stage not in [ScamStage.THREAT, ScamStage.ACTION, ScamStage.CONFIRMED]:
+        elif risk_score >= THRESHOLD_THREAT:
+            # Only move forward: NORMAL/HOOK/TRUST → THREAT
+            if STAGE_PRIORITY[self.scam_stage] < STAGE_PRIORITY[ScamStage.THREAT]:
                 self._transition_stage(ScamStage.THREAT)
-        elif self.risk_score >= 25:
+        elif risk_score >= THRESHOLD_SUSPICIOUS:
             if self.scam_stage == ScamStage.NORMAL:
                 self._transition_stage(ScamStage.HOOK)
     
@@ -590,10 +846,12 @@ class SessionState:
         self.hard_rule_triggered = True
         self.scam_detected = True
         
-        logger.warning(f"🚨 HARD RULE TRIGGERED: {rule_name}")
+        logger.warning("🚨 HARD RULE TRIGGERED: %s", rule_name)
         
-        self.add_risk(score, f"HARD RULE: {rule_name}")
-        if self.scam_stage not in [ScamStage.ACTION, ScamStage.CONFIRMED]:
+        # A zero score would only re-run the threshold check and log "+0"
+        if score:
+            self.add_risk(score, f"HARD RULE: {rule_name}")
+        if STAGE_PRIORITY[self.scam_stage] < STAGE_PRIORITY[ScamStage.ACTION]:
             self._transition_stage(ScamStage.ACTION)
     
     def _transition_stage(self, new_stage: ScamStage):
@@ -605,32 +863,33 @@ class SessionState:
         old_stage = self.scam_stage
         self.stage_history.append((self.scam_stage, self.turn_count, datetime.now()))
         self.scam_stage = new_stage
+        self.scam_stage_value = new_stage.value
         
-        logger.info(f"📈 Stage: {old_stage.value} → {new_stage.value}")
+        logger.info("📈 Stage: %s → %s", old_stage.value, new_stage.value)
         
         self._update_persona_for_stage()
     
     def _update_persona_for_stage(self):
         """Update persona emotion based on current scam stage"""
-        stage_emotions = {
-            ScamStage.NORMAL: EmotionalState.NEUTRAL,
-            ScamStage.HOOK: EmotionalState.CONFUSED,
-            ScamStage.TRUST: EmotionalState.CONCERNED,
-            ScamStage.THREAT: EmotionalState.ANXIOUS,
-            ScamStage.ACTION: EmotionalState.SCARED,
-            ScamStage.CONFIRMED: EmotionalState.COMPLIANT,
-        }
-        new_emotion = stage_emotions.get(self.scam_stage, EmotionalState.NEUTRAL)
+        new_emotion = STAGE_EMOTIONS.get(self.scam_stage, EmotionalState.NEUTRAL)
         self.persona_state.drift_emotion(new_emotion)
-        if self.scam_stage in [ScamStage.THREAT, ScamStage.ACTION, ScamStage.CONFIRMED]:
-            self.persona_state.increase_compliance(0.15)
+        if self.scam_stage in COMPLIANCE_STAGES:
+            self.persona_state.increase_compliance(COMPLIANCE_STEP)
     
     def add_signal(self, signal: TriggeredSignal):
         """Add a triggered signal and update risk"""
-        self.triggered_signals.append(signal)
-        if signal.turn_number not in self.signals_by_turn:
-            self.signals_by_turn[signal.turn_number] = []
-        self.signals_by_turn[signal.turn_number].append(signal)
+        signal.sequence = len(self._sig_scores)
+        self._sig_types.append(signal.signal_type)
+        self._sig_names.append(signal.signal_name)
+        self._sig_scores.append(signal.score)
+        self._sig_hard.append(signal.is_hard_rule)
+        self._sig_sources.append(signal.source)
+        self._sig_turns.append(signal.turn_number)
+        self._sig_descriptions.append(signal.description)
+        if signal.signal_type in ACTION_SIGNAL_TYPES:
+            self.action_signal_count += 1
+        # Score is applied once; a hard rule then only sets the flags and
+        # moves the stage to ACTION (no second add_risk)
         self.add_risk(signal.score, signal.description)
         if signal.is_hard_rule:
             self.trigger_hard_rule(signal.signal_name, 0)
@@ -660,32 +919,32 @@ class SessionState:
             self.add_risk(clamped_boost, f"LLM (reduce): {judgement.reasoning[:50]}")
         
         if judgement.stage_suggestion and judgement.confidence >= 0.7:
-            stage_priority = [ScamStage.NORMAL, ScamStage.HOOK, ScamStage.TRUST,
-                             ScamStage.THREAT, ScamStage.ACTION, ScamStage.CONFIRMED]
-            current_priority = stage_priority.index(self.scam_stage)
-            suggested_priority = stage_priority.index(judgement.stage_suggestion)
-            if suggested_priority > current_priority:
+            if STAGE_PRIORITY[judgement.stage_suggestion] > STAGE_PRIORITY[self.scam_stage]:
                 self._transition_stage(judgement.stage_suggestion)
         if judgement.is_scam_likely and judgement.confidence >= 0.85:
             self.scam_detected = True
     
     def update_stage_from_patterns(self, detected_patterns: List[str]):
         """Update scam stage based on conversation patterns"""
-        pattern_stage_map = {
-            "greeting": ScamStage.HOOK, "introduction": ScamStage.HOOK, "authority_claim": ScamStage.HOOK,
-            "verification": ScamStage.TRUST, "procedure": ScamStage.TRUST, "credibility": ScamStage.TRUST,
-            "urgency": ScamStage.THREAT, "consequence": ScamStage.THREAT, "fear": ScamStage.THREAT,
-            "payment_request": ScamStage.ACTION, "otp_request": ScamStage.ACTION, "link_share": ScamStage.ACTION,
-        }
-        stage_priority = [ScamStage.NORMAL, ScamStage.HOOK, ScamStage.TRUST, 
-                         ScamStage.THREAT, ScamStage.ACTION, ScamStage.CONFIRMED]
-        current_priority = stage_priority.index(self.scam_stage)
+        # Jump straight to the furthest suggested stage: one transition
+        # (one log line, one persona drift) per message, never backwards.
+        # Compliance stages stepped over on the way still count, so the
+        # persona's compliance grows as if each had been entered.
+        current_priority = STAGE_PRIORITY[self.scam_stage]
+        target = None
+        skipped_compliance = 0
         for pattern in detected_patterns:
-            if pattern in pattern_stage_map:
-                suggested = pattern_stage_map[pattern]
-                if stage_priority.index(suggested) > current_priority:
-                    self._transition_stage(suggested)
-                    current_priority = stage_priority.index(suggested)
+            suggested = PATTERN_STAGE_MAP.get(pattern)
+            if suggested is not None and STAGE_PRIORITY[suggested] > current_priority:
+                if target in COMPLIANCE_STAGES:
+                    skipped_compliance += 1
+                target = suggested
+                current_priority = STAGE_PRIORITY[suggested]
+        if target is None:
+            return
+        for _ in range(skipped_compliance):
+            self.persona_state.increase_compliance(COMPLIANCE_STEP)
+        self._transition_stage(target)
     
     def has_high_value_intel(self) -> bool:
         """Check if we have high-value intelligence"""
@@ -700,9 +959,7 @@ class SessionState:
             return False
         has_intel = self.has_high_value_intel()
         min_turns = self.turn_count >= 5
-        action_signals = [s for s in self.triggered_signals 
-                         if s.signal_type in ["financial", "otp_request", "payment_request"]]
-        repeated_demands = len(action_signals) >= 3
+        repeated_demands = self.action_signal_count >= 3
         if has_intel and (min_turns or repeated_demands):
             self.mission_complete = True
             return True
@@ -721,11 +978,11 @@ class SessionState:
             "session_id": self.session_id,
             "risk_score": self.risk_score,  # Guaranteed 0-100
             "risk_score_max": 100,  # For UI display purposes
-            "scam_stage": self.scam_stage.value,
+            "scam_stage": self.scam_stage_value,
             "scam_detected": self.scam_detected,
             "hard_rule_triggered": self.hard_rule_triggered,
             "turn_count": self.turn_count,
-            "signals_count": len(self.triggered_signals),
+            "signals_count": self.signal_count,
             "upi_ids": self.upi_ids,
             "bank_accounts": self.bank_accounts,
             "phone_numbers": self.phone_numbers,
@@ -744,21 +1001,49 @@ class CumulativeRiskEngine:
     3. Clear thresholds: ≥25 SUSPICIOUS, ≥50 THREAT, ≥70 CONFIRMED
     """
     
-    THRESHOLD_SUSPICIOUS = 25
-    THRESHOLD_THREAT = 50
-    THRESHOLD_CONFIRMED = 70
+    THRESHOLD_SUSPICIOUS = THRESHOLD_SUSPICIOUS
+    THRESHOLD_THREAT = THRESHOLD_THREAT
+    THRESHOLD_CONFIRMED = THRESHOLD_CONFIRMED
     
     def __init__(self):
-        self.sessions: Dict[str, SessionState] = {}
+        # Least-recently-used order; oldest sessions evicted past MAX_SESSIONS
+        self.sessions: "OrderedDict[str, SessionState]" = OrderedDict()
         self._init_hard_rules()
         self._init_soft_rules()
         self._init_stage_patterns()
+        # Shared by all sessions on this engine (process lifetime)
+        self._match_rules_cached = lru_cache(maxsize=ANALYSIS_CACHE_SIZE)(self._match_rules)
+        self._match_stage_patterns_cached = lru_cache(maxsize=ANALYSIS_CACHE_SIZE)(
+            self._match_stage_patterns
+        )
     
-    def get_or_create_session(self, session_id: str) -> SessionState:
-        """Get existing session or create new one"""
-        if session_id not in self.sessions:
-            self.sessions[session_id] = SessionState(session_id)
-        return self.sessions[session_id]
+    def get_or_create_session(
+        self,
+        session_id: str,
+        first_message: Optional[str] = None
+    ) -> SessionState:
+        """
+        Get existing session or create new one.
+        
+        If first_message is given when the session is created, the
+        session language is locked from it immediately.
+        
+        BOUNDED: sessions are kept in LRU order; creating one beyond
+        MAX_SESSIONS evicts the least recently used session.
+        """
+        session = self.sessions.get(session_id)
+        if session is not None:
+            self.sessions.move_to_end(session_id)
+            return session
+        
+        session = SessionState(session_id)
+        if first_message is not None:
+            session.lock_language(detect_language(first_message))
+        self.sessions[session_id] = session
+        if len(self.sessions) > MAX_SESSIONS:
+            evicted_id, _ = self.sessions.popitem(last=False)
+            logger.info("🧹 Session evicted (LRU): %s", evicted_id)
+        return session
     
     def get_session(self, session_id: str) -> Optional[SessionState]:
         """Get existing session, return None if not found"""
@@ -777,7 +1062,8 @@ class CumulativeRiskEngine:
                 ),
                 score=35,
                 category=SignalCategory.OTP_REQUEST,
-                description="Explicit request to share OTP/verification code"
+                description="Explicit request to share OTP/verification code",
+                anchors=("share", "send", "tell", "give", "provide", "forward", "enter")
             ),
             HardRule(
                 name="otp_on_phone",
@@ -787,7 +1073,8 @@ class CumulativeRiskEngine:
                 ),
                 score=30,
                 category=SignalCategory.OTP_REQUEST,
-                description="Reference to OTP sent to victim's phone"
+                description="Reference to OTP sent to victim's phone",
+                anchors=("otp", "code")
             ),
             HardRule(
                 name="upi_pin_request",
@@ -798,7 +1085,8 @@ class CumulativeRiskEngine:
                 ),
                 score=40,
                 category=SignalCategory.FINANCIAL,
-                description="Request for UPI PIN"
+                description="Request for UPI PIN",
+                anchors=("enter", "share", "tell", "give", "type", "input")
             ),
             HardRule(
                 name="qr_receive_money",
@@ -810,7 +1098,8 @@ class CumulativeRiskEngine:
                 ),
                 score=35,
                 category=SignalCategory.QR_CODE,
-                description="QR code scam - scan to receive money"
+                description="QR code scam - scan to receive money",
+                anchors=("scan", "accept", "receive", "get")
             ),
             HardRule(
                 name="qr_approve",
@@ -820,7 +1109,8 @@ class CumulativeRiskEngine:
                 ),
                 score=30,
                 category=SignalCategory.QR_CODE,
-                description="Request to approve payment"
+                description="Request to approve payment",
+                anchors=("approve", "accept", "confirm")
             ),
             HardRule(
                 name="remote_access_request",
@@ -832,7 +1122,8 @@ class CumulativeRiskEngine:
                 ),
                 score=40,
                 category=SignalCategory.REMOTE_ACCESS,
-                description="Request to install remote access software"
+                description="Request to install remote access software",
+                anchors=("install", "download", "open")
             ),
             HardRule(
                 name="remote_access_code",
@@ -843,19 +1134,21 @@ class CumulativeRiskEngine:
                 ),
                 score=35,
                 category=SignalCategory.REMOTE_ACCESS,
-                description="Request for remote access code"
+                description="Request for remote access code",
+                anchors=("anydesk", "teamviewer", "digit")
             ),
             HardRule(
                 name="transfer_money_request",
                 pattern=re.compile(
                     r'\b(?:transfer|send|pay|deposit)[\s\w]{0,15}'
                     r'(?:rs\.?|₹|rupees?|amount|money)[\s\w]{0,10}'
-                    r'(?:\d{2,}|to[\s\w]+account|immediately|now|urgent)\b',
+                    r'(?:\d{2,}|to[\s\w]{1,40}account|immediately|now|urgent)\b',
                     re.IGNORECASE
                 ),
                 score=30,
                 category=SignalCategory.PAYMENT_REQUEST,
-                description="Direct money transfer request"
+                description="Direct money transfer request",
+                anchors=("transfer", "send", "pay", "deposit")
             ),
             HardRule(
                 name="fee_request",
@@ -866,7 +1159,8 @@ class CumulativeRiskEngine:
                 ),
                 score=28,
                 category=SignalCategory.FINANCIAL,
-                description="Request for processing/registration fee"
+                description="Request for processing/registration fee",
+                anchors=("fee",)
             ),
             HardRule(
                 name="card_pin_request",
@@ -877,7 +1171,8 @@ class CumulativeRiskEngine:
                 ),
                 score=40,
                 category=SignalCategory.FINANCIAL,
-                description="Request for card PIN/CVV"
+                description="Request for card PIN/CVV",
+                anchors=("pin", "cvv", "number")
             ),
             HardRule(
                 name="phishing_url",
@@ -889,9 +1184,15 @@ class CumulativeRiskEngine:
                 ),
                 score=35,
                 category=SignalCategory.PHISHING,
-                description="Suspicious/phishing URL detected"
+                description="Suspicious/phishing URL detected",
+                anchors=("http",)
             ),
         ]
+        self._hard_rule_gate = RuleGate([rule.anchors for rule in self.hard_rules])
+        # Used instead of rule.pattern on ASCII messages (see lowercase_variant)
+        self._hard_rule_lower_patterns = [
+            lowercase_variant(rule.pattern) for rule in self.hard_rules
+        ]
     
     def _init_soft_rules(self):
         """SOFT RULES - Contribute to cumulative score"""
@@ -1029,6 +1330,33 @@ class CumulativeRiskEngine:
                 description="Trust pressure"
             ),
         ]
+        
+        # One automaton over every (lowercased) soft-rule keyword so analyze_message
+        # scans the message once instead of once per keyword. Keywords
+        # shared by several rules ("cyber crime") map to all of them.
+        self._soft_matcher = KeywordMatcher(
+            kw for rule in self.soft_rules for kw in rule.keywords
+        )
+        keyword_ids = {kw: idx for idx, kw in enumerate(self._soft_matcher.keywords)}
+        # matcher id -> indices of rules containing that keyword
+        self._soft_keyword_rules: List[List[int]] = [[] for _ in keyword_ids]
+        # rule index -> matcher ids of its keywords, in keyword order
+        self._soft_rule_keyword_ids: List[List[int]] = []
+        for rule_idx, rule in enumerate(self.soft_rules):
+            ids = [keyword_ids[kw] for kw in rule.keywords]
+            self._soft_rule_keyword_ids.append(ids)
+            for kw_id in dict.fromkeys(ids):
+                self._soft_keyword_rules[kw_id].append(rule_idx)
+        
+        # rule index -> scaled score by match count, precomputed with the
+        # scoring formula: int(min(score * (1 + n * 0.2), score * 2))
+        self._soft_scaled_scores: List[Tuple[int, ...]] = [
+            tuple(
+                int(min(rule.score * (1 + n * 0.2), rule.score * 2))
+                for n in range(len(rule.keywords) + 1)
+            )
+            for rule in self.soft_rules
+        ]
     
     def _init_stage_patterns(self):
         """Patterns that indicate scam stage progression"""
@@ -1048,6 +1376,31 @@ class CumulativeRiskEngine:
             "link_share": re.compile(r'\b(?:click|open|visit|download)\s+(?:link|app|here)\b', re.I),
             "info_request": re.compile(r'\b(?:provide|share|tell|give)\s+(?:details|number|information)\b', re.I),
         }
+        
+        # Required words per stage pattern (see HardRule.anchors)
+        stage_anchors = {
+            "greeting": ("hello", "hi", "dear", "sir", "madam", "good"),
+            "introduction": ("am", "this", "calling", "speaking", "behalf"),
+            "authority_claim": ("from", "official", "department"),
+            "verification": ("your", "account", "details"),
+            "procedure": ("procedure", "process", "step", "follow", "simple", "easy"),
+            "credibility": ("authorized", "official", "verified", "genuine", "legitimate"),
+            "urgency": ("urgent", "immediate", "right", "asap", "quickly"),
+            "consequence": ("blocked", "suspended", "frozen", "terminated", "legal", "penalty", "fine"),
+            "fear": ("arrest", "jail", "court", "police", "complaint", "case", "fraud"),
+            "deadline": ("within", "today", "deadline", "expires", "chance"),
+            "payment_request": ("pay", "transfer", "send", "deposit"),
+            "otp_request": ("share", "send", "tell", "give"),
+            "link_share": ("click", "open", "visit", "download"),
+            "info_request": ("provide", "share", "tell", "give"),
+        }
+        self._stage_pattern_items = list(self.stage_patterns.items())
+        self._stage_pattern_gate = RuleGate(
+            [stage_anchors.get(name, ()) for name, _ in self._stage_pattern_items]
+        )
+        self._stage_lower_patterns = [
+            lowercase_variant(pattern) for _, pattern in self._stage_pattern_items
+        ]
     
     def analyze_message(
         self, 
@@ -1058,54 +1411,113 @@ class CumulativeRiskEngine:
         """
         Analyze a single message for risk signals.
         Returns: (signals, message_score, hard_rule_triggered)
+        
+        Rule matching is memoized per message text (scripted scam lines
+        repeat across turns and sessions); fresh TriggeredSignal objects
+        are built for every call with the current turn number.
+        """
+        if len(message) <= ANALYSIS_CACHE_MAX_TEXT_LEN:
+            matched, message_score, hard_rule_triggered = self._match_rules_cached(message)
+        else:
+            matched, message_score, hard_rule_triggered = self._match_rules(message)
+        
+        signals: List[TriggeredSignal] = [
+            TriggeredSignal(
+                signal_type=signal_type,
+                signal_name=signal_name,
+                score=score,
+                is_hard_rule=is_hard_rule,
+                source="rule",
+                turn_number=turn_number,
+                description=description
+            )
+            for signal_type, signal_name, score, is_hard_rule, description in matched
+        ]
+        return signals, message_score, hard_rule_triggered
+    
+    def _match_rules(self, message: str) -> Tuple[Tuple[tuple, ...], int, bool]:
+        """
+        Turn-independent part of analyze_message.
+        Returns: ((signal_type, signal_name, score, is_hard_rule, description), ...),
+                 message_score, hard_rule_triggered
         """
-        signals: List[TriggeredSignal] = []
+        matched = []
         message_score = 0
         hard_rule_triggered = False
         message_lower = message.lower()
+        # lower() and casefold() agree on ASCII; skip the second pass
+        message_folded = message_lower if message.isascii() else anchor_fold(message)
         
         # Check HARD RULES first - IMMEDIATE DETECTION (Problem #11)
-        for rule in self.hard_rules:
-            if rule.pattern.search(message):
+        # Only rules whose anchor words occur are searched
+        hard_rules = self.hard_rules
+        lower_patterns = self._hard_rule_lower_patterns if message.isascii() else None
+        for rule_idx in self._hard_rule_gate.candidates(message_folded):
+            rule = hard_rules[rule_idx]
+            lower_pattern = lower_patterns[rule_idx] if lower_patterns else None
+            if (lower_pattern.search(message_lower) if lower_pattern is not None
+                    else rule.pattern.search(message)):
                 hard_rule_triggered = True
-                signal = TriggeredSignal(
-                    signal_type=rule.category.value,
-                    signal_name=rule.name,
-                    score=rule.score,
-                    is_hard_rule=True,
-                    source="rule",
-                    turn_number=turn_number,
-                    description=rule.description
+                matched.append(
+                    (rule.category.value, rule.name, rule.score, True, rule.description)
                 )
-                signals.append(signal)
                 message_score += rule.score
         
         # Check SOFT RULES - CUMULATIVE (Problem #3)
-        for rule in self.soft_rules:
-            matches = [kw for kw in rule.keywords if kw.lower() in message_lower]
+        # Single automaton pass, then only the rules that were hit are
+        # visited (in rule order, matches in each rule's keyword order)
+        hit_ids = set(self._soft_matcher.find_ids(message_lower))
+        soft_keyword_rules = self._soft_keyword_rules
+        hit_rules = sorted({
+            rule_idx for kw_id in hit_ids for rule_idx in soft_keyword_rules[kw_id]
+        })
+        soft_rules = self.soft_rules
+        rule_keyword_ids = self._soft_rule_keyword_ids
+        scaled_scores = self._soft_scaled_scores
+        for rule_idx in hit_rules:
+            rule = soft_rules[rule_idx]
+            matches = [
+                kw for kw, kw_id in zip(rule.keywords, rule_keyword_ids[rule_idx])
+                if kw_id in hit_ids
+            ]
             if matches:
-                scaled_score = min(rule.score * (1 + len(matches) * 0.2), rule.score * 2)
-                signal = TriggeredSignal(
-                    signal_type=rule.category.value,
-                    signal_name=rule.name,
-                    score=int(scaled_score),
-                    is_hard_rule=False,
-                    source="rule",
-                    turn_number=turn_number,
-                    description=f"{rule.description}: {', '.join(matches[:3])}"
-                )
-                signals.append(signal)
-                message_score += int(scaled_score)
+                scaled_score = scaled_scores[rule_idx][len(matches)]
+                matched.append((
+                    rule.category.value,
+                    rule.name,
+                    scaled_score,
+                    False,
+                    f"{rule.description}: {', '.join(matches[:3])}"
+                ))
+                message_score += scaled_score
         
-        return signals, message_score, hard_rule_triggered
+        return tuple(matched), message_score, hard_rule_triggered
     
     def detect_stage_patterns(self, message: str) -> List[str]:
-        """Detect which stage patterns are present in message"""
+        """
+        Detect which stage patterns are present in message.
+        Memoized per message text like analyze_message; returns a new list.
+        """
+        if len(message) <= ANALYSIS_CACHE_MAX_TEXT_LEN:
+            return list(self._match_stage_patterns_cached(message))
+        return list(self._match_stage_patterns(message))
+    
+    def _match_stage_patterns(self, message: str) -> Tuple[str, ...]:
+        """Uncached stage-pattern detection (see detect_stage_patterns)"""
         detected = []
-        for pattern_name, pattern in self.stage_patterns.items():
-            if pattern.search(message):
+        if message.isascii():
+            message_folded = message.lower()
+            lower_patterns = self._stage_lower_patterns
+        else:
+            message_folded = anchor_fold(message)
+            lower_patterns = None
+        for idx in self._stage_pattern_gate.candidates(message_folded):
+            pattern_name, pattern = self._stage_pattern_items[idx]
+            lower_pattern = lower_patterns[idx] if lower_patterns else None
+            if (lower_pattern.search(message_folded) if lower_pattern is not None
+                    else pattern.search(message)):
                 detected.append(pattern_name)
-        return detected
+        return tuple(detected)
     
     def apply_signals_to_session(
         self, 
@@ -1134,17 +1546,11 @@ class CumulativeRiskEngine:
         if not ml_is_scam or ml_confidence < 0.6:
             return
         
-        if ml_confidence >= 0.9:
-            score = 25
-        elif ml_confidence >= 0.8:
-            score = 18
-        elif ml_confidence >= 0.7:
-            score = 12
-        else:
-            score = 8
+        # <0.7 → 8, ≥0.7 → 12, ≥0.8 → 18, ≥0.9 → 25
+        score = ML_CONFIDENCE_SCORES[bisect_right(ML_CONFIDENCE_CUTOFFS, ml_confidence)]
         
         signal = TriggeredSignal(
-            signal_type=SignalCategory.ML_DETECTION.value,
+            signal_type=ML_DETECTION_SIGNAL_TYPE,
             signal_name="ml_classifier",
             score=score,
             is_hard_rule=False,
@@ -1169,11 +1575,11 @@ class CumulativeRiskEngine:
         session = self.get_or_create_session(session_id)
         return {
             "risk_score": session.risk_score,
-            "scam_stage": session.scam_stage.value,
+            "scam_stage": session.scam_stage_value,
             "scam_detected": session.scam_detected,
             "hard_rule_triggered": session.hard_rule_triggered,
             "turn_count": session.turn_count,
-            "total_signals": len(session.triggered_signals),
+            "total_signals": session.signal_count,
         }
     
     def increment_turn(self, session_id: str):
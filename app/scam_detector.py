@@ -16,24 +16,49 @@ KEY DESIGN:
 """
 
 import os
-import json
+import re
 import logging
+from collections import OrderedDict
 from typing import Dict, List, Optional
 from dotenv import load_dotenv
-from groq import AsyncGroq
 
 from .risk_engine import (
     risk_engine, ScamStage, LLMJudgement, 
     TriggeredSignal, SignalCategory
 )
-from .ml_detector import ml_detector
+from .ml_detector import ml_detector, parse_llm_json, get_groq_client
 
 load_dotenv()
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Module logger; handlers/levels are configured by the app (main.py)
 logger = logging.getLogger(__name__)
 
+# Raw LLM replies kept per exact prompt (LRU); scam scripts repeat verbatim
+# across sessions, so identical judge inputs skip the Groq round-trip
+JUDGEMENT_CACHE_SIZE = 1024
+
+# The judge JSON is ~100-150 tokens; the cap only stops runaway replies
+# (a truncated reply fails to parse and takes the fallback path)
+JUDGE_MAX_TOKENS = 256
+
+# Signal names that count as high-risk in the fallback judgement
+HIGH_RISK_SIGNAL_PATTERN = re.compile(r'otp|pin|payment|transfer|arrest|block')
+
+# Static judge rubric, kept byte-identical across calls so the provider can
+# reuse its prompt cache for this prefix; per-turn data goes in the user turn
+JUDGE_SYSTEM_PROMPT = """You are a fraud detection expert. Analyze conversations for scam patterns through REASONING, not keyword matching. Output only valid JSON.
+
+Reason through these checks:
+1. AUTHORITY: Does the claimed bank/government/police act like the real one? (Real banks never ask OTP over chat; real police don't threaten arrest for payments; real government doesn't demand instant payment.)
+2. EVASION: Is the sender vague, dodging questions, refusing verifiable details, or scripted?
+3. COERCION: Fear (arrest, account loss, legal action), urgency (deadlines), or authority abuse?
+4. ESCALATION: Is it moving from information toward payment, OTP or immediate action?
+
+Reply with ONLY this JSON:
+{"is_scam_likely": true/false, "confidence": 0.0-1.0, "scam_type": "type or null", "reasoning": "one sentence on WHY", "risk_boost": 0-30, "suggested_stage": "NORMAL|HOOK|TRUST|THREAT|ACTION|CONFIRMED|null", "red_flags": ["list", "of", "flags"]}
+
+risk_boost: 0 if no scam indicators, 10-15 moderate, 20-30 strong. Advance suggested_stage only if escalation is detected."""
+
 
 class LLMReasoningJudge:
     """
@@ -48,8 +73,11 @@ class LLMReasoningJudge:
     
     def __init__(self):
         self.groq_api_key = os.getenv("GROQ_API_KEY")
-        self.client = AsyncGroq(api_key=self.groq_api_key) if self.groq_api_key else None
+        # Shares its connection pool with the intent classifier
+        self.client = get_groq_client() if self.groq_api_key else None
         self.model = "llama-3.1-8b-instant"
+        # prompt → raw reply text, least-recently-used first
+        self._reply_cache: "OrderedDict[str, str]" = OrderedDict()
     
     async def judge(
         self,
@@ -85,79 +113,32 @@ class LLMReasoningJudge:
             # Build detected signals context
             signals_text = ", ".join(detected_signals[:5]) if detected_signals else "None yet"
             
-            prompt = f"""You are an expert fraud analyst evaluating a potential scam conversation.
-
-CONVERSATION CONTEXT:
+            # Only per-turn data here; the rubric lives in JUDGE_SYSTEM_PROMPT
+            prompt = f"""CONVERSATION CONTEXT:
 {history_text}
 
 CURRENT MESSAGE: "{message}"
 
-CURRENT ANALYSIS:
-- Risk Score: {current_risk_score}/100
-- Current Stage: {current_stage.value}
-- Detected Signals: {signals_text}
-
-ANSWER THESE REASONING QUESTIONS:
-
-1. AUTHORITY CHECK: Is the sender's claimed authority (bank/government/police) behaving consistently with how that authority actually operates?
-   - Real banks don't ask for OTP over chat
-   - Real police don't threaten arrest over phone for payments
-   - Real government doesn't demand immediate payment
-
-2. EVASION CHECK: Is the sender avoiding direct questions or being procedurally vague?
-   - Refusing to provide verifiable details
-   - Rushing past clarification requests
-   - Giving generic/scripted responses
-
-3. COERCION CHECK: Is there social engineering or emotional manipulation?
-   - Fear tactics (arrest, account loss, legal action)
-   - Urgency pressure (deadline, limited time)
-   - Authority abuse (I am officer, this is official)
+Risk Score: {current_risk_score}/100 | Stage: {current_stage.value} | Signals: {signals_text}"""
 
-4. ESCALATION CHECK: Is the conversation escalating toward financial/credential request?
-   - Moving from information to action
-   - Introducing payment or OTP request
-   - Pushing toward immediate action
-
-Based on your analysis, provide your judgement in this EXACT JSON format:
-{{
-    "is_scam_likely": true/false,
-    "confidence": 0.0-1.0,
-    "scam_type": "type or null",
-    "reasoning": "one sentence explaining your judgement",
-    "risk_boost": 0-30,
-    "suggested_stage": "NORMAL|HOOK|TRUST|THREAT|ACTION|CONFIRMED|null",
-    "red_flags": ["list", "of", "flags"]
-}}
-
-IMPORTANT:
-- risk_boost should be 0 if no scam indicators, 10-15 for moderate, 20-30 for strong
-- suggested_stage should advance the stage if escalation detected
-- Be specific in reasoning about WHY this is or isn't a scam"""
-
-            response = await self.client.chat.completions.create(
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are a fraud detection expert. Analyze conversations for scam patterns through REASONING, not keyword matching. Output only valid JSON."
-                    },
-                    {"role": "user", "content": prompt}
-                ],
-                model=self.model,
-                temperature=0.1,
-                max_tokens=400
-            )
-            
-            result_text = response.choices[0].message.content.strip()
+            reply_text = self._reply_cache.get(prompt)
+            cached = reply_text is not None
+            if cached:
+                self._reply_cache.move_to_end(prompt)
+            else:
+                response = await self.client.chat.completions.create(
+                    messages=[
+                        {"role": "system", "content": JUDGE_SYSTEM_PROMPT},
+                        {"role": "user", "content": prompt}
+                    ],
+                    model=self.model,
+                    temperature=0.1,
+                    max_tokens=JUDGE_MAX_TOKENS
+                )
+                reply_text = response.choices[0].message.content.strip()
             
             # Parse JSON response
-            if "```" in result_text:
-                result_text = result_text.split("```")[1]
-                if result_text.startswith("json"):
-                    result_text = result_text[4:]
-                result_text = result_text.strip()
-            
-            result = json.loads(result_text)
+            result = parse_llm_json(reply_text)
             
             # Parse stage suggestion
             stage_suggestion = None
@@ -167,7 +148,7 @@ IMPORTANT:
                 except ValueError:
                     pass
             
-            return LLMJudgement(
+            judgement = LLMJudgement(
                 turn_number=turn_number,
                 is_scam_likely=result.get("is_scam_likely", False),
                 confidence=result.get("confidence", 0.5),
@@ -178,8 +159,17 @@ IMPORTANT:
                 red_flags=result.get("red_flags", [])
             )
             
+            # Only replies that produced a judgement are worth reusing;
+            # valid JSON of the wrong shape must be retried, not cached
+            if not cached:
+                self._reply_cache[prompt] = reply_text
+                if len(self._reply_cache) > JUDGEMENT_CACHE_SIZE:
+                    self._reply_cache.popitem(last=False)
+            
+            return judgement
+            
         except Exception as e:
-            print(f"LLM judge error: {e}")
+            logger.warning("⚠️ LLM judge error: %s", e, exc_info=True)
             return self._fallback_judgement(turn_number, detected_signals)
     
     def _fallback_judgement(
@@ -189,8 +179,9 @@ IMPORTANT:
     ) -> LLMJudgement:
         """Fallback when LLM unavailable - use signal-based heuristic"""
         # Count high-risk signals
-        high_risk = ["otp", "pin", "payment", "transfer", "arrest", "block"]
-        risk_count = sum(1 for s in detected_signals if any(hr in s.lower() for hr in high_risk))
+        risk_count = sum(
+            1 for s in detected_signals if HIGH_RISK_SIGNAL_PATTERN.search(s.lower())
+        )
         
         return LLMJudgement(
             turn_number=turn_number,
@@ -318,15 +309,14 @@ class HybridScamDetector:
         return result
     
     def _extract_history_texts(self, conversation_history: list) -> List[str]:
-        """Extract text from conversation history"""
-        history_texts = []
-        if conversation_history:
-            for msg in conversation_history:
-                if hasattr(msg, 'text'):
-                    history_texts.append(msg.text)
-                elif isinstance(msg, dict):
-                    history_texts.append(msg.get('text', ''))
-        return history_texts
+        """Extract text from conversation history (Message models or dicts)"""
+        if not conversation_history:
+            return []
+        return [
+            msg.get('text', '') if isinstance(msg, dict) else msg.text
+            for msg in conversation_history
+            if isinstance(msg, dict) or hasattr(msg, 'text')
+        ]
     
     async def _run_ml_detection(
         self, 
@@ -350,7 +340,7 @@ class HybridScamDetector:
                 "explanation": single_pred.explanation
             }
         except Exception as e:
-            print(f"ML detection error: {e}")
+            logger.warning("⚠️ ML detection error: %s", e, exc_info=True)
             return {"is_scam": False, "confidence": 0.0, "features_triggered": []}
     
     def _make_decision(
@@ -425,7 +415,8 @@ class HybridScamDetector:
             "scamDetected": scam_detected,
             "confidence": round(confidence, 3),
             "risk_score": session.risk_score,
-            "scam_stage": session.scam_stage.value,
+            "scam_stage": session.scam_stage_value,
+            "scam_stage_enum": session.scam_stage,
             "hard_rule_triggered": hard_rule_triggered,
             "turn_count": session.turn_count,
             "reasons": reasons[:5],
@@ -458,4 +449,5 @@ class ScamDetector:
             "reasons": result["reasons"],
             "risk_score": result.get("risk_score", 0),
             "scam_stage": result.get("scam_stage", "NORMAL"),
+            "scam_stage_enum": result.get("scam_stage_enum", ScamStage.NORMAL),
         }